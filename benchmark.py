@@ -0,0 +1,717 @@
+"""Замеры производительности PetClinic
+
+Запуск: python benchmark.py [--sizes 1000 100000] [--only registry persistence]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from columnar import ColumnarPetClinic
+from concurrent_clinic import ConcurrentPetClinic
+from datagen import DEFAULT_SEED, generate_animals, generate_clinic, generate_records, generate_visits
+from history import MedicalHistory
+from lazy import LazyPetClinic
+from parallel_loader import load_shards
+from sharded import ShardedPetClinic
+from snapshot import load_snapshot, save_snapshot
+from main import (Animal, Dog, InvalidAnimalDataError, PetClinic, _animal_from_xml_fields, _animal_to_xml,
+                  iter_animals_from_json, iter_animals_from_xml)
+from metrics import MetricsRegistry
+
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PROBES = 1_000
+VISITS_PER_ANIMAL = 10
+REGRESSION_THRESHOLD = 0.10
+# Параметры замера: по ним сопоставляются строки двух прогонов, остальные числа в строке — метрики.
+ROW_KEYS = ('size', 'partition', 'shards', 'workers', 'per_shard', 'threads', 'variant')
+
+
+def per_op_us(func, count: int) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def measure(func, memory: bool = True) -> Tuple[float, Optional[float]]:
+    """Время чистого прогона и, при memory=True, пик памяти (МБ) отдельного прогона под tracemalloc."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    if not memory:
+        return elapsed, None
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def retained_mb(func) -> tuple:
+    tracemalloc.start()
+    result = func()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current / 2 ** 20
+
+
+def bench_registry(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    if memory:
+        clinic, clinic_mb = retained_mb(lambda: generate_clinic(size, seed))
+    else:
+        clinic, clinic_mb = generate_clinic(size, seed), None
+
+    rng = random.Random(seed)
+    extra = list(generate_animals(PROBES, seed + 1, start_id=size + 1))
+    probe_ids = [rng.randint(1, size) for _ in range(PROBES)]
+    probe_owners = [clinic.find_animal_by_id(animal_id).owner for animal_id in probe_ids]
+
+    add_us = per_op_us(lambda: [clinic.add_animal(animal) for animal in extra], PROBES)
+    find_us = per_op_us(lambda: [clinic.find_animal_by_id(i) for i in probe_ids], PROBES)
+    owner_us = per_op_us(lambda: [clinic.find_animals_by_owner(owner) for owner in probe_owners], PROBES)
+    query_us = per_op_us(lambda: [clinic.find_animals(owner=owner, species="dog")
+                                  for owner in probe_owners], PROBES)
+    remove_us = per_op_us(lambda: [clinic.remove_animal(animal.animal_id) for animal in extra], PROBES)
+
+    return {'size': size, 'add_us': add_us, 'find_us': find_us, 'remove_us': remove_us,
+            'owner_us': owner_us, 'query_us': query_us, 'clinic_mb': clinic_mb}
+
+
+def bench_persistence(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    clinic = generate_clinic(size, seed)
+    result = {'size': size}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = (
+            ('json', clinic.save_to_json, PetClinic.load_from_json, iter_animals_from_json),
+            ('xml', clinic.save_to_xml, PetClinic.load_from_xml, iter_animals_from_xml),
+        )
+        for name, save, load, stream in cases:
+            filename = os.path.join(tmp, f'animals.{name}')
+            result[f'{name}_save_s'], result[f'{name}_save_peak_mb'] = measure(lambda: save(filename), memory)
+            result[f'{name}_load_s'], result[f'{name}_load_peak_mb'] = measure(
+                lambda: load(PetClinic(), filename), memory)
+            result[f'{name}_stream_s'], result[f'{name}_stream_peak_mb'] = measure(
+                lambda: sum(1 for _ in stream(filename)), memory)
+            result[f'{name}_file_mb'] = os.path.getsize(filename) / 2 ** 20
+    return result
+
+
+def bench_columnar(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'animals.json')
+        generate_clinic(size, seed).save_to_json(filename)
+        clinic, objects_mb = retained_mb(lambda: load_clinic(filename))
+        store, columnar_mb = retained_mb(lambda: ColumnarPetClinic.load_from_json(filename))
+
+    start = time.perf_counter()
+    by_breed = {}
+    for animal in clinic.animals:
+        by_breed.setdefault(animal.breed, []).append(animal.age)
+    {breed: sum(ages) / len(ages) for breed, ages in by_breed.items()}
+    objects_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.aggregate('breed', 'age', 'mean')
+    columnar_s = time.perf_counter() - start
+
+    return {'size': size, 'objects_mb': objects_mb, 'columnar_mb': columnar_mb,
+            'objects_aggregate_s': objects_s, 'columnar_aggregate_s': columnar_s}
+
+
+def load_clinic(filename: str) -> PetClinic:
+    clinic = PetClinic()
+    clinic.load_from_json_stream(filename)
+    return clinic
+
+
+def bench_bulk(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    records = list(generate_records(size, seed))
+
+    def one_by_one():
+        clinic = PetClinic()
+        for record in records:
+            clinic.add_animal(Animal.from_dict(record))
+
+    start = time.perf_counter()
+    one_by_one()
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    PetClinic().add_many(records)
+    bulk_s = time.perf_counter() - start
+
+    return {'size': size, 'add_animal_s': single_s, 'add_many_s': bulk_s}
+
+
+def bench_restore(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    clinic = generate_clinic(size, seed)
+
+    result = {'size': size}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, f'animals.{name}') for name in ('json', 'xml', 'snap')}
+        clinic.save_to_json(paths['json'])
+        clinic.save_to_xml(paths['xml'])
+        save_snapshot(clinic, paths['snap'])
+        loaders = {
+            'json': lambda: PetClinic().load_from_json(paths['json']),
+            'xml': lambda: PetClinic().load_from_xml(paths['xml']),
+            'snap': lambda: load_snapshot(paths['snap']),
+        }
+        for name, load in loaders.items():
+            start = time.perf_counter()
+            load()
+            result[f'{name}_s'] = time.perf_counter() - start
+    return result
+
+
+def bench_decode(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    records = list(generate_records(size, seed))
+    texts = [{key: str(value) for key, value in record.items()} for record in records]
+    animals = [Animal.from_dict(record, trusted=True) for record in records]
+    baseline_animals = [BaselineAnimal.from_dict(record) for record in records]
+    elements = [ET.fromstring(_animal_to_xml(animal)) for animal in animals]
+
+    # baseline_* — путь до схем: from_dict по типам с проверками в __init__ и find() на каждое поле XML
+    cases = {
+        'baseline_dict': lambda: [BaselineAnimal.from_dict(record) for record in records],
+        'dict': lambda: [Animal.from_dict(record) for record in records],
+        'trusted': lambda: [Animal.from_dict(record, trusted=True) for record in records],
+        'baseline_xml': lambda: [_baseline_from_xml_element(element) for element in elements],
+        'xml': lambda: [_animal_from_xml_fields(element.get('type'), {child.tag: child.text for child in element})
+                        for element in elements],
+        'text': lambda: [_animal_from_xml_fields(text['type'], text) for text in texts],
+        'baseline_to_dict': lambda: [animal.to_dict() for animal in baseline_animals],
+        'to_dict': lambda: [animal.to_dict() for animal in animals],
+        'to_xml': lambda: [_animal_to_xml(animal) for animal in animals],
+    }
+    result = {'size': size}
+    for name, run_case in cases.items():
+        # лучший из трёх прогонов: разброс одиночного замера больше разницы между путями
+        result[f'{name}_per_s'] = size / min(measure(run_case, memory=False)[0] for _ in range(3))
+    return result
+
+
+def bench_autosave(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    clinic = generate_clinic(size, seed)
+    clinic.cache_fragments = True
+    rng = random.Random(seed)
+    changed = [clinic.find_animal_by_id(rng.randint(1, size)) for _ in range(max(1, size // 100))]
+
+    result = {'size': size}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (('json', clinic.save_to_json), ('xml', clinic.save_to_xml)):
+            filename = os.path.join(tmp, f'animals.{name}')
+            for phase in ('cold', 'warm', 'changed'):
+                if phase == 'changed':
+                    for animal in changed:
+                        animal.age += 1
+                start = time.perf_counter()
+                save(filename)
+                result[f'{name}_{phase}_s'] = time.perf_counter() - start
+    return result
+
+
+def bench_lazy(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    clinic = generate_clinic(size, seed)
+
+    result = {'size': size}
+    rng = random.Random(seed)
+    probe_ids = [rng.randint(1, size) for _ in range(PROBES)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save in (('json', clinic.save_to_json), ('xml', clinic.save_to_xml)):
+            filename = os.path.join(tmp, f'animals.{name}')
+            save(filename)
+            start = time.perf_counter()
+            with LazyPetClinic(filename) as lazy:
+                lazy.find_animal_by_id(probe_ids[0])
+                result[f'{name}_first_s'] = time.perf_counter() - start
+                result[f'{name}_find_us'] = per_op_us(
+                    lambda: [lazy.find_animal_by_id(i) for i in probe_ids], PROBES)
+    return result
+
+
+def bench_history(size: int, seed: int = DEFAULT_SEED, memory: bool = True) -> dict:
+    visits = list(generate_visits(size * VISITS_PER_ANIMAL, size, seed))
+    history = MedicalHistory()
+
+    def record():
+        history.clear()
+        for animal_id, visit in visits:
+            history.record(animal_id, visit)
+
+    record_s, record_mb = measure(record, memory)
+    rng = random.Random(seed)
+    probe_ids = [rng.randint(1, size) for _ in range(PROBES)]
+    now = visits[-1][1].timestamp
+    month_ago = now - timedelta(days=30)
+    result = {
+        'size': size,
+        'visits': len(visits),
+        'record_per_s': len(visits) / record_s,
+        'record_mb': record_mb,
+        'last10_us': per_op_us(lambda: [history.last(i, 10) for i in probe_ids], PROBES),
+        'month_us': per_op_us(lambda: [history.between(i, month_ago, now) for i in probe_ids], PROBES),
+        'recent_status_us': per_op_us(lambda: [history.recent_animals("Болен", now=now) for _ in range(100)], 100),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, save, load in (('json', history.save_to_jsonl, history.load_from_jsonl),
+                                 ('xml', history.save_to_xml, history.load_from_xml)):
+            filename = os.path.join(tmp, f'history.{name}')
+            start = time.perf_counter()
+            save(filename)
+            result[f'{name}_save_s'] = time.perf_counter() - start
+            start = time.perf_counter()
+            load(filename)
+            result[f'{name}_load_s'] = time.perf_counter() - start
+    return result
+
+
+def bench_parallel(shards: int = 8, per_shard: int = 25_000, seed: int = DEFAULT_SEED) -> List[dict]:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        filenames = []
+        for shard in range(shards):
+            clinic = PetClinic()
+            clinic.add_many(generate_animals(per_shard, seed + shard, start_id=1 + shard * per_shard))
+            filenames.append(os.path.join(tmp, f'branch_{shard}.{"xml" if shard % 2 else "json"}'))
+            (clinic.save_to_xml if shard % 2 else clinic.save_to_json)(filenames[-1])
+
+        workers = 1
+        while workers <= min(shards, os.cpu_count() or 1):
+            start = time.perf_counter()
+            load_shards(filenames, workers=workers)
+            rows.append({'workers': workers, 'shards': shards, 'per_shard': per_shard,
+                         'load_s': time.perf_counter() - start})
+            workers *= 2
+    return rows
+
+
+def bench_concurrent(size: int = 100_000, ops_per_thread: int = 20_000, max_threads: int = 8,
+                     seed: int = DEFAULT_SEED) -> List[dict]:
+    clinic = ConcurrentPetClinic()
+    clinic.add_many(generate_animals(size, seed))
+    rows = []
+
+    def worker(number: int):
+        for i in range(ops_per_thread):
+            step = i % 20
+            if step == 0:
+                clinic.add_animal(Dog(clinic.allocate_id(), "Новичок", 1, "Дворняга", f"Стойка {number}"))
+            elif step == 1:
+                owned = clinic.find_animals_by_owner(f"Стойка {number}")
+                if owned:
+                    clinic.remove_animal(owned[-1].animal_id)
+            elif step == 2:
+                len(clinic.animals)
+            else:
+                clinic.find_animal_by_id(1 + (number * 7919 + i) % size)
+
+    threads = 1
+    while threads <= max_threads:
+        pool = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+        start = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        rows.append({'threads': threads, 'ops_per_s': threads * ops_per_thread / (time.perf_counter() - start)})
+        threads *= 2
+    return rows
+
+
+class BaselineAnimal(ABC):
+    """Копия Animal до перехода на __slots__ и схемы: атрибуты в __dict__, проверки в __init__."""
+
+    def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str, health_status: str = "Здоров"):
+        self._validate_positive_int(animal_id, "ID")
+        self._validate_positive_int(age, "Возраст")
+        self._validate_string(name, "Имя")
+        self._validate_string(breed, "Порода")
+        self._validate_string(owner, "Владелец")
+
+        self.animal_id = animal_id
+        self.name = name
+        self.age = age
+        self.breed = breed
+        self.owner = owner
+        self.health_status = health_status
+
+    def _validate_positive_int(self, value: int, field_name: str):
+        if not isinstance(value, int) or value <= 0:
+            raise InvalidAnimalDataError(f"{field_name} должен быть положительным целым числом")
+
+    def _validate_string(self, value: str, field_name: str):
+        if not isinstance(value, str) or not value.strip():
+            raise InvalidAnimalDataError(f"{field_name} не может быть пустым")
+
+    @abstractmethod
+    def make_sound(self) -> str:
+        pass
+
+    def to_dict(self) -> dict:
+        return {
+            'type': self.__class__.__name__,
+            'animal_id': self.animal_id,
+            'name': self.name,
+            'age': self.age,
+            'breed': self.breed,
+            'owner': self.owner,
+            'health_status': self.health_status,
+            **self._specific_attributes()
+        }
+
+    @abstractmethod
+    def _specific_attributes(self) -> dict:
+        pass
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BaselineAnimal':
+        animal_type = data.get('type')
+        if animal_type == 'Dog':
+            return BaselineDog.from_dict(data)
+        elif animal_type == 'Cat':
+            return BaselineCat.from_dict(data)
+        elif animal_type == 'Bird':
+            return BaselineBird.from_dict(data)
+        else:
+            raise InvalidAnimalDataError(f"Неизвестный тип животного: {animal_type}")
+
+
+class BaselineDog(BaselineAnimal):
+    def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str,
+                 health_status: str = "Здоров", dog_size: str = "Средний"):
+        super().__init__(animal_id, name, age, breed, owner, health_status)
+        self._validate_dog_size(dog_size)
+        self.dog_size = dog_size
+
+    def _validate_dog_size(self, size: str):
+        valid_sizes = ["Маленький", "Средний", "Большой"]
+        if size not in valid_sizes:
+            raise InvalidAnimalDataError(f"Размер собаки должен быть одним из: {valid_sizes}")
+
+    def make_sound(self) -> str:
+        return "Гав! Гав!"
+
+    def _specific_attributes(self) -> dict:
+        return {'dog_size': self.dog_size}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BaselineDog':
+        return cls(
+            animal_id=data['animal_id'],
+            name=data['name'],
+            age=data['age'],
+            breed=data['breed'],
+            owner=data['owner'],
+            health_status=data.get('health_status', 'Здоров'),
+            dog_size=data.get('dog_size', 'Средний')
+        )
+
+
+class BaselineCat(BaselineAnimal):
+    def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str,
+                 health_status: str = "Здоров", is_indoor: bool = True):
+        super().__init__(animal_id, name, age, breed, owner, health_status)
+        self.is_indoor = bool(is_indoor)
+
+    def make_sound(self) -> str:
+        return "Мяу! Мяу!"
+
+    def _specific_attributes(self) -> dict:
+        return {'is_indoor': self.is_indoor}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BaselineCat':
+        return cls(
+            animal_id=data['animal_id'],
+            name=data['name'],
+            age=data['age'],
+            breed=data['breed'],
+            owner=data['owner'],
+            health_status=data.get('health_status', 'Здоров'),
+            is_indoor=data.get('is_indoor', True)
+        )
+
+
+class BaselineBird(BaselineAnimal):
+    def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str,
+                 health_status: str = "Здоров", wingspan: float = 0.0):
+        super().__init__(animal_id, name, age, breed, owner, health_status)
+        self._validate_wingspan(wingspan)
+        self.wingspan = wingspan
+
+    def _validate_wingspan(self, wingspan: float):
+        if not isinstance(wingspan, (int, float)) or wingspan < 0:
+            raise InvalidAnimalDataError("Размах крыльев должен быть неотрицательным числом")
+
+    def make_sound(self) -> str:
+        return "Чик-чирик!"
+
+    def _specific_attributes(self) -> dict:
+        return {'wingspan': self.wingspan}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BaselineBird':
+        return cls(
+            animal_id=data['animal_id'],
+            name=data['name'],
+            age=data['age'],
+            breed=data['breed'],
+            owner=data['owner'],
+            health_status=data.get('health_status', 'Здоров'),
+            wingspan=data.get('wingspan', 0.0)
+        )
+
+
+def _baseline_from_xml_element(animal_elem: ET.Element) -> BaselineAnimal:
+    """Разбор элемента <animal>, как в load_from_xml до схем: find() на каждое поле."""
+    animal_type = animal_elem.get('type')
+    animal_data = {
+        'type': animal_type,
+        'animal_id': int(animal_elem.find('animal_id').text),
+        'name': animal_elem.find('name').text,
+        'age': int(animal_elem.find('age').text),
+        'breed': animal_elem.find('breed').text,
+        'owner': animal_elem.find('owner').text,
+        'health_status': animal_elem.find('health_status').text
+    }
+
+    if animal_type == 'Dog':
+        animal_data['dog_size'] = animal_elem.find('dog_size').text
+    elif animal_type == 'Cat':
+        animal_data['is_indoor'] = animal_elem.find('is_indoor').text.lower() == 'true'
+    elif animal_type == 'Bird':
+        animal_data['wingspan'] = float(animal_elem.find('wingspan').text)
+
+    return BaselineAnimal.from_dict(animal_data)
+
+
+def bench_instances(count: int = 100_000, seed: int = DEFAULT_SEED) -> List[dict]:
+    records = [record for record in generate_records(count * 3, seed) if record['type'] == 'Dog'][:count]
+    count = len(records)
+    builders = {
+        'dict': lambda: [BaselineDog.from_dict(r) for r in records],
+        'slots': lambda: [Dog.from_dict(r) for r in records],
+        'trusted': lambda: [Dog.from_dict(r, trusted=True) for r in records],
+    }
+    rows = []
+    for label, build in builders.items():
+        start = time.perf_counter()
+        build()
+        per_s = count / (time.perf_counter() - start)
+        _, retained = retained_mb(build)
+        rows.append({'variant': label, 'objects_per_s': per_s, 'bytes_per_object': retained * 2 ** 20 / count})
+    return rows
+
+
+def bench_sharded(size: int = 100_000, shards: int = 4, seed: int = DEFAULT_SEED) -> List[dict]:
+    records = list(generate_records(size, seed))
+    rng = random.Random(seed)
+    owners = [records[rng.randrange(size)]['owner'] for _ in range(PROBES)]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for partition in ('single', 'range', 'owner'):
+            for workers in ((1,) if partition == 'single' else (1, shards)):
+                if partition == 'single':
+                    clinic = PetClinic()
+                else:
+                    clinic = ShardedPetClinic(shards, partition, workers=workers)
+                start = time.perf_counter()
+                clinic.add_many(records, trusted=True)
+                add_s = time.perf_counter() - start
+                row = {'partition': partition, 'shards': 1 if partition == 'single' else shards, 'workers': workers,
+                       'add_many_s': add_s,
+                       'by_owner_us': per_op_us(lambda: [clinic.find_animals_by_owner(o) for o in owners], PROBES),
+                       'find_us': per_op_us(lambda: [clinic.find_animals(species='cat', health_status='болен')
+                                                     for _ in range(100)], 100),
+                       'save_s': None, 'load_s': None, 'load_branch_s': None}
+                if partition != 'single':
+                    directory = os.path.join(tmp, f'{partition}_{workers}')
+                    start = time.perf_counter()
+                    clinic.save(directory)
+                    row['save_s'] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    ShardedPetClinic.load(directory, workers=workers).close()
+                    row['load_s'] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    ShardedPetClinic.load(directory, only=[0], workers=workers).close()
+                    row['load_branch_s'] = time.perf_counter() - start
+                    clinic.close()
+                rows.append(row)
+    return rows
+
+
+def bench_metrics(size: int = 100_000, seed: int = DEFAULT_SEED) -> List[dict]:
+    rows = []
+    for variant in ('off', 'registry'):
+        clinic = generate_clinic(size, seed)
+        if variant == 'registry':
+            clinic.metrics = MetricsRegistry()
+        extra = list(generate_animals(PROBES, seed + 1, start_id=size + 1))
+        probe_ids = [1 + (i * 7919) % size for i in range(PROBES)]
+        rows.append({
+            'variant': variant,
+            'add_us': per_op_us(lambda: [clinic.add_animal(animal) for animal in extra], PROBES),
+            'find_us': per_op_us(lambda: [clinic.find_animal_by_id(i) for i in probe_ids], PROBES),
+            'remove_us': per_op_us(lambda: [clinic.remove_animal(animal.animal_id) for animal in extra], PROBES),
+        })
+    return rows
+
+
+# имя: (заголовок, функция, наибольший размер или None)
+SIZED_BENCHMARKS: Dict[str, Tuple[str, Callable[..., dict], Optional[int]]] = {
+    'registry': ("Операции реестра, мкс на операцию", bench_registry, None),
+    'persistence': ("Сохранение и загрузка JSON/XML", bench_persistence, None),
+    'columnar': ("Объекты против колонок", bench_columnar, 100_000),
+    'bulk': ("Поштучное и пакетное добавление", bench_bulk, 100_000),
+    'restore': ("Восстановление: JSON, XML, снимок", bench_restore, None),
+    'decode': ("Схемы: разбор и кодирование, записей в секунду", bench_decode, None),
+    'autosave': ("Повторное сохранение: без кэша, с кэшем, после изменения 1%", bench_autosave, None),
+    'lazy': ("Ленивая загрузка: время до первого поиска", bench_lazy, None),
+    'history': (f"История болезни: {VISITS_PER_ANIMAL} визитов на животное", bench_history, 100_000),
+}
+FIXED_BENCHMARKS: Dict[str, Tuple[str, Callable[..., List[dict]]]] = {
+    'parallel': ("Параллельная загрузка филиалов", bench_parallel),
+    'concurrent': ("Потокобезопасная клиника", bench_concurrent),
+    'instances': ("Стоимость экземпляров", bench_instances),
+    'metrics': ("Накладные расходы метрик, мкс на операцию", bench_metrics),
+    'sharded': ("Шарды: разбиение по ID и по владельцу", bench_sharded),
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], only: Optional[List[str]] = None, seed: int = DEFAULT_SEED,
+        memory: bool = True, report: Optional[Callable[[str, str, List[dict]], None]] = None) -> dict:
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'sizes': sizes,
+        },
+        'benchmarks': {},
+    }
+    for name, (title, bench, max_size) in SIZED_BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        rows = [bench(size, seed, memory) for size in sizes if max_size is None or size <= max_size]
+        results['benchmarks'][name] = rows
+        if report:
+            report(name, title, rows)
+    for name, (title, bench) in FIXED_BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        rows = results['benchmarks'][name] = bench(seed=seed)
+        if report:
+            report(name, title, rows)
+    return results
+
+
+def _format(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}" if value < 1_000 else f"{value:.0f}"
+    return '-' if value is None else str(value)
+
+
+def print_table(name: str, title: str, rows: List[dict]) -> None:
+    print(f"\n{title} [{name}]")
+    if not rows:
+        print("  нет данных для выбранных размеров")
+        return
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(_format(row.get(column))) for row in rows)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(_format(row.get(column)).rjust(width) for column, width in zip(columns, widths)))
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith('_per_s')
+
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Сравнивает два прогона; возвращает строки с метриками, ухудшившимися больше порога."""
+    regressions = []
+    for name, rows in current['benchmarks'].items():
+        old_rows = baseline.get('benchmarks', {}).get(name)
+        if not old_rows or not rows:
+            continue
+        keys = [column for column in rows[0] if column in ROW_KEYS]
+        old_by_key = {tuple(row.get(column) for column in keys): row for row in old_rows}
+        for row in rows:
+            old = old_by_key.get(tuple(row.get(column) for column in keys))
+            if old is None:
+                continue
+            label = ', '.join(f"{column}={row.get(column)}" for column in keys)
+            for metric, value in row.items():
+                before = old.get(metric)
+                if metric in keys or not isinstance(value, (int, float)) or not isinstance(before, (int, float)):
+                    continue
+                if not before:
+                    continue
+                change = value / before - 1
+                worse = -change if _higher_is_better(metric) else change
+                marker = ''
+                if worse > threshold:
+                    marker = '  <-- регрессия'
+                    regressions.append(f"{name}[{label}].{metric}: {before:.4g} -> {value:.4g}")
+                print(f"  {name}[{label}].{metric}: {before:.4g} -> {value:.4g} ({change:+.1%}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности PetClinic")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--only', nargs='+', choices=list(SIZED_BENCHMARKS) + list(FIXED_BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--no-memory', action='store_true', help="не замерять пики памяти")
+    parser.add_argument('--output', help="записать результаты в JSON-файл")
+    parser.add_argument('--compare', help="сравнить с результатами предыдущего прогона")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.only, args.seed, not args.no_memory, report=print_table)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nСравнение с {args.compare} (коммит {baseline.get('meta', {}).get('commit')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегрессий больше {args.threshold:.0%}: {len(regressions)}")
+            sys.exit(1)
+        print("\nРегрессий не найдено")
+
+
+if __name__ == "__main__":
+    main()
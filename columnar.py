@@ -0,0 +1,329 @@
+"""Колоночное хранилище животных для аналитики по большим выборкам"""
+
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from main import (Animal, AnimalError, AnimalNotFoundError, Bird, Cat, Dog, FileOperationError,
+                  InvalidAnimalDataError, PetClinic, _casefold, iter_animals_from_json, iter_animals_from_xml,
+                  write_json_stream, write_xml_stream)
+
+
+SPECIES = {'Dog': Dog, 'Cat': Cat, 'Bird': Bird}
+SPECIES_NAMES = list(SPECIES)
+
+AGGREGATES: Dict[str, Callable[[List[float]], float]] = {
+    'count': len,
+    'sum': sum,
+    'mean': lambda values: sum(values) / len(values),
+    'min': min,
+    'max': max,
+}
+
+
+class _Dictionary:
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def encode(self, value: Any) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def matching_codes(self, value: Any) -> set:
+        key = _casefold(value)
+        return {code for code, known in enumerate(self.values) if _casefold(known) == key}
+
+
+class _Bitmap:
+    def __init__(self):
+        self._bytes = bytearray()
+        self._size = 0
+
+    def append(self, bit: bool) -> None:
+        if self._size % 8 == 0:
+            self._bytes.append(0)
+        if bit:
+            self._bytes[self._size >> 3] |= 1 << (self._size & 7)
+        self._size += 1
+
+    def __getitem__(self, index: int) -> bool:
+        return bool(self._bytes[index >> 3] & (1 << (index & 7)))
+
+
+class AnimalView:
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: 'ColumnarPetClinic', row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def species(self) -> str:
+        return SPECIES_NAMES[self._store._types[self._row]]
+
+    @property
+    def animal_id(self) -> int:
+        return self._store._ids[self._row]
+
+    @property
+    def name(self) -> str:
+        return self._store._names[self._row]
+
+    @property
+    def age(self) -> int:
+        return self._store._ages[self._row]
+
+    @property
+    def breed(self) -> str:
+        return self._store._breeds.values[self._store._breed_codes[self._row]]
+
+    @property
+    def owner(self) -> str:
+        return self._store._owners.values[self._store._owner_codes[self._row]]
+
+    @property
+    def health_status(self) -> str:
+        return self._store._statuses.values[self._store._status_codes[self._row]]
+
+    @property
+    def dog_size(self) -> str:
+        self._require('Dog', 'dog_size')
+        return self._store._dog_sizes.values[self._store._dog_size_codes[self._row]]
+
+    @property
+    def is_indoor(self) -> bool:
+        self._require('Cat', 'is_indoor')
+        return self._store._indoor[self._row]
+
+    @property
+    def wingspan(self) -> float:
+        self._require('Bird', 'wingspan')
+        return self._store._wingspans[self._row]
+
+    def _require(self, species: str, attribute: str) -> None:
+        if self.species != species:
+            raise AttributeError(f"У животного типа {self.species} нет атрибута {attribute}")
+
+    def _specific_attributes(self) -> dict:
+        species = self.species
+        if species == 'Dog':
+            return {'dog_size': self.dog_size}
+        elif species == 'Cat':
+            return {'is_indoor': self.is_indoor}
+        return {'wingspan': self.wingspan}
+
+    def to_dict(self) -> dict:
+        return {
+            'type': self.species,
+            'animal_id': self.animal_id,
+            'name': self.name,
+            'age': self.age,
+            'breed': self.breed,
+            'owner': self.owner,
+            'health_status': self.health_status,
+            **self._specific_attributes()
+        }
+
+    def display_info(self) -> str:
+        return Animal.display_info(self)
+
+    def make_sound(self) -> str:
+        return SPECIES[self.species].make_sound(self)
+
+    def materialize(self) -> Animal:
+        return Animal.from_dict(self.to_dict(), trusted=True)
+
+
+class ColumnarPetClinic:
+    def __init__(self):
+        self._ids = array('q')
+        self._types = array('b')
+        self._names: List[str] = []
+        self._ages = array('l')
+        self._breeds = _Dictionary()
+        self._breed_codes = array('l')
+        self._owners = _Dictionary()
+        self._owner_codes = array('l')
+        self._statuses = _Dictionary()
+        self._status_codes = array('l')
+        self._dog_sizes = _Dictionary()
+        self._dog_size_codes = array('l')
+        self._wingspans = array('d')
+        self._indoor = _Bitmap()
+        self._rows: Dict[int, int] = {}
+
+    @classmethod
+    def from_animals(cls, animals: Iterable[Animal]) -> 'ColumnarPetClinic':
+        store = cls()
+        for animal in animals:
+            store._append(animal)
+        return store
+
+    @classmethod
+    def from_clinic(cls, clinic: PetClinic) -> 'ColumnarPetClinic':
+        return cls.from_animals(clinic.animals)
+
+    @classmethod
+    def load_from_json(cls, filename: str) -> 'ColumnarPetClinic':
+        try:
+            return cls.from_animals(iter_animals_from_json(filename))
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при загрузке из JSON: {str(e)}")
+
+    @classmethod
+    def load_from_xml(cls, filename: str) -> 'ColumnarPetClinic':
+        try:
+            return cls.from_animals(iter_animals_from_xml(filename))
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при загрузке из XML: {str(e)}")
+
+    def to_clinic(self) -> PetClinic:
+        clinic = PetClinic()
+        for view in self.animals:
+            clinic._insert(view.materialize())
+        clinic._update_next_id()
+        return clinic
+
+    @property
+    def animals(self) -> Iterator[AnimalView]:
+        return (AnimalView(self, row) for row in self._rows.values())
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, animal_id: int) -> bool:
+        return animal_id in self._rows
+
+    def _append(self, animal: Animal) -> None:
+        species = animal.__class__.__name__
+        if species not in SPECIES:
+            raise InvalidAnimalDataError(f"Неизвестный тип животного: {species}")
+        if animal.animal_id in self._rows:
+            raise InvalidAnimalDataError(f"Животное с ID {animal.animal_id} уже существует")
+
+        self._rows[animal.animal_id] = len(self._ids)
+        self._ids.append(animal.animal_id)
+        self._types.append(SPECIES_NAMES.index(species))
+        self._names.append(animal.name)
+        self._ages.append(animal.age)
+        self._breed_codes.append(self._breeds.encode(animal.breed))
+        self._owner_codes.append(self._owners.encode(animal.owner))
+        self._status_codes.append(self._statuses.encode(animal.health_status))
+        self._dog_size_codes.append(self._dog_sizes.encode(getattr(animal, 'dog_size', None)))
+        self._wingspans.append(getattr(animal, 'wingspan', 0.0))
+        self._indoor.append(getattr(animal, 'is_indoor', False))
+
+    def add_animal(self, animal: Animal) -> None:
+        try:
+            self._append(animal)
+        except Exception as e:
+            raise AnimalError(f"Ошибка при добавлении животного: {str(e)}")
+
+    def remove_animal(self, animal_id: int) -> bool:
+        if self._rows.pop(animal_id, None) is None:
+            raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+        if len(self._rows) * 2 < len(self._ids):
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        rows = list(self._rows.values())
+        for name in ('_ids', '_types', '_ages', '_breed_codes', '_owner_codes',
+                     '_status_codes', '_dog_size_codes', '_wingspans'):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[row] for row in rows)))
+        self._names = [self._names[row] for row in rows]
+
+        indoor = _Bitmap()
+        for row in rows:
+            indoor.append(self._indoor[row])
+        self._indoor = indoor
+        self._rows = {animal_id: row for row, animal_id in enumerate(self._ids)}
+
+    def find_animal_by_id(self, animal_id: int) -> Optional[AnimalView]:
+        row = self._rows.get(animal_id)
+        return None if row is None else AnimalView(self, row)
+
+    def find_animals_by_owner(self, owner: str) -> List[AnimalView]:
+        return [AnimalView(self, row) for row in self.filter(owner=owner)]
+
+    def filter(self, species: Optional[str] = None, breed: Optional[str] = None, owner: Optional[str] = None,
+               health_status: Optional[str] = None, is_indoor: Optional[bool] = None,
+               min_age: Optional[int] = None, max_age: Optional[int] = None) -> List[int]:
+        rows = list(self._rows.values())
+
+        if species is not None:
+            code = next((i for i, name in enumerate(SPECIES_NAMES) if name.casefold() == species.casefold()), -1)
+            types = self._types
+            rows = [row for row in rows if types[row] == code]
+        for codes, dictionary, value in ((self._breed_codes, self._breeds, breed),
+                                         (self._owner_codes, self._owners, owner),
+                                         (self._status_codes, self._statuses, health_status)):
+            if value is not None:
+                wanted = dictionary.matching_codes(value)
+                rows = [row for row in rows if codes[row] in wanted]
+        if is_indoor is not None:
+            cat, indoor = SPECIES_NAMES.index('Cat'), self._indoor
+            rows = [row for row in rows if self._types[row] == cat and indoor[row] == is_indoor]
+        if min_age is not None:
+            ages = self._ages
+            rows = [row for row in rows if ages[row] >= min_age]
+        if max_age is not None:
+            ages = self._ages
+            rows = [row for row in rows if ages[row] <= max_age]
+        return rows
+
+    def _column(self, name: str) -> tuple:
+        columns = {
+            'species': (self._types, SPECIES_NAMES),
+            'breed': (self._breed_codes, self._breeds.values),
+            'owner': (self._owner_codes, self._owners.values),
+            'health_status': (self._status_codes, self._statuses.values),
+            'dog_size': (self._dog_size_codes, self._dog_sizes.values),
+            'age': (self._ages, None),
+            'wingspan': (self._wingspans, None),
+            'is_indoor': (self._indoor, None),
+        }
+        if name not in columns:
+            raise InvalidAnimalDataError(f"Колонка {name} не поддерживается")
+        return columns[name]
+
+    def aggregate(self, by: str, column: str = 'age', func: str = 'mean', **filters: Any) -> Dict[Any, float]:
+        if func not in AGGREGATES:
+            raise InvalidAnimalDataError(f"Агрегат {func} не поддерживается")
+        keys, decoded = self._column(by)
+        values, _ = self._column(column)
+
+        groups: Dict[Any, List[float]] = {}
+        for row in self.filter(**filters):
+            groups.setdefault(keys[row], []).append(values[row])
+        return {decoded[key] if decoded is not None else key: AGGREGATES[func](group)
+                for key, group in groups.items()}
+
+    def indoor_cat_ratio(self) -> float:
+        rows = self.filter(species='Cat')
+        return sum(self._indoor[row] for row in rows) / len(rows) if rows else 0.0
+
+    def save_to_json(self, filename: str) -> None:
+        try:
+            metadata = {'saved_at': datetime.now().isoformat(), 'total_animals': len(self)}
+            with open(filename, 'w', encoding='utf-8') as f:
+                write_json_stream(f, self.animals, metadata)
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при сохранении в JSON: {str(e)}")
+
+    def save_to_xml(self, filename: str) -> None:
+        try:
+            metadata = {'saved_at': datetime.now().isoformat(), 'total_animals': len(self)}
+            with open(filename, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='\n') as f:
+                write_xml_stream(f, self.animals, metadata)
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при сохранении в XML: {str(e)}")
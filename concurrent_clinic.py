@@ -0,0 +1,129 @@
+"""Потокобезопасная клиника для нескольких стоек регистрации"""
+
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from main import Animal, PetClinic
+
+
+MAX_SNAPSHOT_ATTEMPTS = 3
+
+
+class ReadWriteLock:
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+def _writes(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write():
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._version += 1
+                self._snapshot = None
+    return wrapper
+
+
+def _reads(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self._indexes_ready:
+            with self._lock.write():
+                if not self._indexes_ready:
+                    self._build_indexes()
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ConcurrentPetClinic(PetClinic):
+    def __init__(self):
+        super().__init__()
+        self._lock = ReadWriteLock()
+        self._version = 0
+        self._snapshot: Optional[Tuple[Animal, ...]] = None
+
+    @property
+    def animals(self) -> Tuple[Animal, ...]:
+        """Неизменяемый снимок реестра на текущую версию.
+
+        Первое чтение после записи копирует реестр (O(n)) без блокировки, так что писатели его не ждут;
+        под блокировкой чтения только сверяется версия. Если за время копирования прошла запись, копия
+        повторяется, а после MAX_SNAPSHOT_ATTEMPTS неудач снимается под блокировкой, чтобы читатель
+        не голодал. Дальнейшие чтения до следующей записи возвращают тот же кортеж.
+        """
+        for _ in range(MAX_SNAPSHOT_ATTEMPTS):
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+            version = self._version
+            try:
+                snapshot = tuple(self._animals.values())
+            except RuntimeError:
+                continue
+            with self._lock.read():
+                if self._version == version:
+                    self._snapshot = snapshot
+                    return snapshot
+        with self._lock.read():
+            snapshot = self._snapshot
+            if snapshot is None:
+                snapshot = self._snapshot = tuple(self._animals.values())
+            return snapshot
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def allocate_id(self) -> int:
+        with self._lock.write():
+            return self._get_next_id()
+
+    add_animal = _writes(PetClinic.add_animal)
+    remove_animal = _writes(PetClinic.remove_animal)
+    add_many = _writes(PetClinic.add_many)
+    reindex_animal = _writes(PetClinic.reindex_animal)
+    load_from_json = _writes(PetClinic.load_from_json)
+    load_from_json_stream = _writes(PetClinic.load_from_json_stream)
+    load_from_xml = _writes(PetClinic.load_from_xml)
+    load_from_xml_stream = _writes(PetClinic.load_from_xml_stream)
+
+    find_animal_by_id = _reads(PetClinic.find_animal_by_id)
+    find_animals_by_owner = _reads(PetClinic.find_animals_by_owner)
+    find_animals = _reads(PetClinic.find_animals)
@@ -0,0 +1,200 @@
+"""Генератор синтетических данных клиники с фиксированным зерном"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple
+
+from history import Visit
+from main import Animal, FileOperationError, PetClinic, write_json_stream, write_xml_stream
+
+
+DEFAULT_SEED = 42
+OWNERS_PER_ANIMAL = 0.4
+OWNER_SKEW = 2.0
+
+SPECIES_WEIGHTS = (('Dog', 45), ('Cat', 40), ('Bird', 15))
+
+MALE_FIRST_NAMES = (
+    "Александр", "Алексей", "Андрей", "Артём", "Борис", "Вадим", "Василий", "Виктор", "Владимир", "Григорий",
+    "Дмитрий", "Евгений", "Иван", "Игорь", "Илья", "Кирилл", "Константин", "Максим", "Михаил", "Никита",
+    "Николай", "Олег", "Павел", "Пётр", "Роман", "Сергей", "Степан", "Тимофей", "Фёдор", "Юрий",
+)
+FEMALE_FIRST_NAMES = (
+    "Алёна", "Алина", "Анастасия", "Анна", "Валентина", "Валерия", "Вера", "Виктория", "Галина", "Дарья",
+    "Евгения", "Екатерина", "Елена", "Елизавета", "Ирина", "Ксения", "Любовь", "Людмила", "Марина", "Мария",
+    "Надежда", "Наталья", "Ольга", "Полина", "Светлана", "Софья", "Татьяна", "Ульяна", "Юлия", "Яна",
+)
+SURNAMES = (
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков", "Фёдоров",
+    "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров", "Павлов", "Козлов", "Степанов", "Николаев",
+    "Орлов", "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев", "Соловьёв", "Борисов", "Яковлев", "Григорьев",
+    "Романов", "Воробьёв", "Сергеев", "Кузьмин", "Фролов", "Александров", "Дмитриев", "Королёв", "Гусев", "Киселёв",
+)
+PATRONYMICS = (
+    "Александров", "Алексеев", "Андреев", "Викторов", "Владимиров", "Дмитриев", "Евгеньев", "Иванов",
+    "Игорев", "Михайлов", "Николаев", "Олегов", "Павлов", "Петров", "Сергеев", "Юрьев",
+)
+
+PET_NAMES = {
+    'Dog': ("Бобик", "Шарик", "Рекс", "Дружок", "Тузик", "Барон", "Граф", "Джек", "Лайка", "Жучка", "Найда",
+            "Белка", "Стрелка", "Альма", "Мухтар", "Полкан", "Бим", "Лорд", "Гера", "Чара", "Туман", "Буран"),
+    'Cat': ("Мурка", "Барсик", "Васька", "Пушок", "Рыжик", "Снежок", "Маркиз", "Дымка", "Муся", "Соня", "Тимоша",
+            "Кузя", "Симба", "Багира", "Люся", "Филя", "Мася", "Персик", "Ночка", "Уголёк", "Матроскин", "Тиша"),
+    'Bird': ("Кеша", "Гоша", "Чижик", "Жако", "Рио", "Кирюша", "Петруша", "Лори", "Зефир", "Пятнышко", "Яша",
+             "Кузя", "Сеня", "Тоша", "Чика", "Птаха", "Жора", "Фантик"),
+}
+
+# порода, вес, признак: размер собаки, доля домашних кошек, диапазон размаха крыльев
+DOG_BREEDS: Tuple[Tuple[str, int, str], ...] = (
+    ("Дворняга", 30, "Средний"), ("Лабрадор", 12, "Большой"), ("Немецкая овчарка", 10, "Большой"),
+    ("Чихуахуа", 7, "Маленький"), ("Йоркширский терьер", 7, "Маленький"), ("Такса", 6, "Маленький"),
+    ("Хаски", 6, "Большой"), ("Спаниель", 5, "Средний"), ("Бигль", 5, "Средний"), ("Корги", 4, "Средний"),
+    ("Мопс", 4, "Маленький"), ("Ротвейлер", 3, "Большой"), ("Алабай", 1, "Большой"),
+)
+CAT_BREEDS: Tuple[Tuple[str, int, float], ...] = (
+    ("Беспородная", 40, 0.6), ("Британская", 12, 0.9), ("Шотландская вислоухая", 10, 0.9),
+    ("Сиамская", 8, 0.8), ("Мейн-кун", 7, 0.8), ("Сибирская", 7, 0.5), ("Персидская", 5, 0.95),
+    ("Сфинкс", 4, 1.0), ("Бенгальская", 3, 0.85), ("Русская голубая", 4, 0.85),
+)
+BIRD_BREEDS: Tuple[Tuple[str, int, Tuple[float, float]], ...] = (
+    ("Волнистый попугай", 40, (0.25, 0.32)), ("Канарейка", 20, (0.2, 0.25)), ("Корелла", 15, (0.3, 0.36)),
+    ("Неразлучник", 10, (0.22, 0.28)), ("Жако", 6, (0.46, 0.52)), ("Амадина", 5, (0.14, 0.17)),
+    ("Ара", 2, (0.9, 1.2)), ("Какаду", 2, (0.55, 0.7)),
+)
+MAX_AGE = {'Dog': 16, 'Cat': 20, 'Bird': 12}
+
+HEALTH_WEIGHTS = (("Здоров", 80), ("Болен", 12), ("На лечении", 8))
+_FEMININE_STATUSES = {"Здоров": "Здорова", "Болен": "Больна"}
+
+# диагноз, вес, лечение, статус после визита
+DIAGNOSES: Tuple[Tuple[str, int, str, str], ...] = (
+    ("Плановый осмотр", 40, "Не требуется", "Здоров"), ("Вакцинация", 20, "Прививка", "Здоров"),
+    ("Отит", 8, "Ушные капли", "На лечении"), ("Гастрит", 8, "Диета и пробиотики", "На лечении"),
+    ("Дерматит", 7, "Мазь", "На лечении"), ("Глистная инвазия", 6, "Антигельминтик", "На лечении"),
+    ("ОРВИ", 6, "Антибиотики", "Болен"), ("Перелом", 2, "Гипс", "Болен"), ("Мочекаменная болезнь", 3, "Операция", "Болен"),
+)
+VETS = ("Айболитов А. И.", "Павлова Е. С.", "Хэрриот Д. А.", "Ватсон Д. Г.", "Соколова М. В.", "Дулиттл Д. П.")
+HISTORY_START = datetime(2020, 1, 1)
+HISTORY_DAYS = 5 * 365
+
+
+def _cumulative(weights) -> List[int]:
+    total, result = 0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def owner_name(rank: int) -> str:
+    """Детерминированное ФИО владельца по его рангу популярности."""
+    female = rank % 2 == 1
+    rank //= 2
+    firsts = FEMALE_FIRST_NAMES if female else MALE_FIRST_NAMES
+    first = firsts[rank % len(firsts)]
+    rank //= len(firsts)
+    surname = SURNAMES[rank % len(SURNAMES)]
+    rank //= len(SURNAMES)
+    patronymic = PATRONYMICS[rank % len(PATRONYMICS)] + ("на" if female else "ич")
+    if female:
+        surname += "а"
+    rank //= len(PATRONYMICS)
+    name = f"{surname} {first} {patronymic}"
+    return f"{name} ({rank + 1})" if rank else name
+
+
+def generate_records(count: int, seed: int = DEFAULT_SEED, start_id: int = 1) -> Iterator[dict]:
+    """Поток словарей животных; у немногих владельцев (приюты, заводчики) много питомцев."""
+    rng = random.Random(seed)
+    owners = max(1, int(count * OWNERS_PER_ANIMAL))
+    owner_cache: dict = {}
+
+    species_names = [name for name, _ in SPECIES_WEIGHTS]
+    species_cum = _cumulative(weight for _, weight in SPECIES_WEIGHTS)
+    breeds = {'Dog': DOG_BREEDS, 'Cat': CAT_BREEDS, 'Bird': BIRD_BREEDS}
+    breed_cum = {species: _cumulative(weight for _, weight, _ in table) for species, table in breeds.items()}
+    statuses = [status for status, _ in HEALTH_WEIGHTS]
+    status_cum = _cumulative(weight for _, weight in HEALTH_WEIGHTS)
+
+    for animal_id in range(start_id, start_id + count):
+        species, = rng.choices(species_names, cum_weights=species_cum)
+        (breed, _, trait), = rng.choices(breeds[species], cum_weights=breed_cum[species])
+
+        rank = int(owners * rng.random() ** OWNER_SKEW)
+        owner = owner_cache.get(rank)
+        if owner is None:
+            owner = owner_cache[rank] = owner_name(rank)
+
+        female = rng.random() < 0.5
+        status, = rng.choices(statuses, cum_weights=status_cum)
+        if female:
+            status = _FEMININE_STATUSES.get(status, status)
+
+        record = {
+            'type': species,
+            'animal_id': animal_id,
+            'name': rng.choice(PET_NAMES[species]),
+            'age': 1 + min(int(rng.expovariate(1 / (MAX_AGE[species] / 3))), MAX_AGE[species] - 1),
+            'breed': breed,
+            'owner': owner,
+            'health_status': status,
+        }
+        if species == 'Dog':
+            record['dog_size'] = trait
+        elif species == 'Cat':
+            record['is_indoor'] = rng.random() < trait
+        else:
+            record['wingspan'] = round(rng.uniform(*trait), 2)
+        yield record
+
+
+def generate_animals(count: int, seed: int = DEFAULT_SEED, start_id: int = 1) -> Iterator[Animal]:
+    for record in generate_records(count, seed, start_id):
+        yield Animal.from_dict(record, trusted=True)
+
+
+def generate_visits(count: int, animals: int, seed: int = DEFAULT_SEED,
+                    start: datetime = HISTORY_START, days: int = HISTORY_DAYS) -> Iterator[Tuple[int, Visit]]:
+    """Визиты в хронологическом порядке, распределённые по животным 1..animals."""
+    rng = random.Random(seed)
+    cum = _cumulative(weight for _, weight, _, _ in DIAGNOSES)
+    step = days * 86_400 / max(1, count)
+    for number in range(count):
+        (diagnosis, _, treatment, status), = rng.choices(DIAGNOSES, cum_weights=cum)
+        timestamp = start + timedelta(seconds=int((number + rng.random()) * step))
+        yield rng.randint(1, animals), Visit(timestamp, diagnosis, treatment, rng.choice(VETS), status)
+
+
+def generate_clinic(count: int, seed: int = DEFAULT_SEED) -> PetClinic:
+    clinic = PetClinic()
+    clinic.add_many(generate_animals(count, seed))
+    return clinic
+
+
+def write_dataset(filename: str, count: int, seed: int = DEFAULT_SEED) -> None:
+    metadata = {'saved_at': datetime.now().isoformat(), 'total_animals': count}
+    try:
+        if filename.lower().endswith('.xml'):
+            with open(filename, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='\n') as f:
+                write_xml_stream(f, generate_animals(count, seed), metadata)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                write_json_stream(f, generate_animals(count, seed), metadata)
+    except OSError as e:
+        raise FileOperationError(f"Ошибка при записи набора данных в {filename}: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных клиники")
+    parser.add_argument('count', type=int, help="количество животных")
+    parser.add_argument('output', help="файл .json или .xml")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    write_dataset(args.output, args.count, args.seed)
+    print(f"Записано {args.count} животных в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""История болезни: визиты по каждому животному во временном порядке"""
+
+import itertools
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from main import (JSON_CHUNK_SIZE, AnimalError, AnimalNotFoundError, FileOperationError, InvalidAnimalDataError,
+                  PetClinic, ProgressCallback, _casefold, _xml_field)
+
+
+VISIT_FIELDS = ('diagnosis', 'treatment', 'vet')
+DEFAULT_RECENT_DAYS = 30
+
+_EPOCH = datetime(1970, 1, 1)
+_TICK = timedelta(microseconds=1)
+
+
+class Visit(NamedTuple):
+    timestamp: datetime
+    diagnosis: str
+    treatment: str
+    vet: str
+    status: Optional[str] = None
+
+
+def _ticks(timestamp: datetime) -> int:
+    """Микросекунды от эпохи; время наивное местное, как datetime.now() в остальной клинике."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _TICK
+
+
+def _from_ticks(ticks: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ticks)
+
+
+class _Series:
+    """Значения, упорядоченные по времени: дописывание за O(1), сортировка откладывается до запроса."""
+
+    __slots__ = ('times', 'items', 'ordered')
+
+    def __init__(self):
+        self.times = array('q')
+        self.items: list = []
+        self.ordered = True
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, ticks: int, item: Any) -> None:
+        if self.times and ticks < self.times[-1]:
+            self.ordered = False
+        self.times.append(ticks)
+        self.items.append(item)
+
+    def _sort(self) -> None:
+        order = sorted(range(len(self.times)), key=self.times.__getitem__)
+        self.times = array('q', [self.times[i] for i in order])
+        self.items = [self.items[i] for i in order]
+        self.ordered = True
+
+    def span(self, start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        if not self.ordered:
+            self._sort()
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect_right(self.times, end)
+        return lo, hi
+
+    def discard(self, item: Any) -> None:
+        keep = [i for i, value in enumerate(self.items) if value != item]
+        self.times = array('q', [self.times[i] for i in keep])
+        self.items = [self.items[i] for i in keep]
+
+
+class MedicalHistory:
+    """Визиты хранятся по животным; индексы по статусу и диагнозу упорядочены по времени.
+
+    Запросы «кто был со статусом X за последние 30 дней» находят границы окна бинарным
+    поиском и читают только визиты внутри него, не перебирая всю историю.
+    """
+
+    def __init__(self):
+        self._timelines: Dict[int, _Series] = {}
+        self._by_status: Dict[str, _Series] = {}
+        self._by_diagnosis: Dict[str, _Series] = {}
+        self._status_names: Dict[str, str] = {}
+        self._known_details: Dict[tuple, tuple] = {}
+        self._forgotten: Dict[int, _Series] = {}
+        self._stale = 0
+        self._count = 0
+        self._indexes_ready = True
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, animal_id: int) -> bool:
+        return animal_id in self._timelines
+
+    def animal_ids(self) -> List[int]:
+        return list(self._timelines)
+
+    def clear(self) -> None:
+        self._timelines.clear()
+        self._by_status.clear()
+        self._by_diagnosis.clear()
+        self._status_names.clear()
+        self._known_details.clear()
+        self._forgotten.clear()
+        self._stale = 0
+        self._count = 0
+        self._indexes_ready = True
+
+    def _details(self, diagnosis: str, treatment: str, vet: str, status: Optional[str]) -> tuple:
+        """Проверенный кортеж деталей визита; одинаковые кортежи хранятся в одном экземпляре."""
+        key = (diagnosis, treatment, vet, status)
+        details = self._known_details.get(key)
+        if details is not None:
+            return details
+        for field, value in zip(VISIT_FIELDS, key):
+            if not isinstance(value, str) or not value.strip():
+                raise InvalidAnimalDataError(f"Поле {field} визита должно быть непустой строкой")
+        if status is not None and (not isinstance(status, str) or not status.strip()):
+            raise InvalidAnimalDataError("Статус визита должен быть непустой строкой")
+        details = self._known_details[key] = tuple(None if value is None else sys.intern(value) for value in key)
+        return details
+
+    def record(self, animal_id: int, visit: Visit) -> None:
+        if not isinstance(animal_id, int) or animal_id <= 0:
+            raise InvalidAnimalDataError("ID должно быть положительным целым числом")
+        if not isinstance(visit.timestamp, datetime):
+            raise InvalidAnimalDataError("Время визита должно быть датой и временем")
+        self._append(animal_id, _ticks(visit.timestamp), self._details(*visit[1:]))
+
+    def _append(self, animal_id: int, ticks: int, details: tuple) -> None:
+        if animal_id in self._forgotten:
+            self._purge(animal_id)
+        timeline = self._timelines.get(animal_id)
+        if timeline is None:
+            timeline = self._timelines[animal_id] = _Series()
+        timeline.append(ticks, details)
+        self._count += 1
+        if self._indexes_ready:
+            self._index_visit(animal_id, ticks, details)
+
+    def _index_visit(self, animal_id: int, ticks: int, details: tuple) -> None:
+        diagnosis, _, _, status = details
+        self._index(self._by_diagnosis, diagnosis, ticks, animal_id)
+        if status is not None:
+            self._index(self._by_status, status, ticks, animal_id)
+            self._status_names.setdefault(_casefold(status), status)
+
+    @staticmethod
+    def _index(index: Dict[str, _Series], value: str, ticks: int, animal_id: int) -> None:
+        key = _casefold(value)
+        posting = index.get(key)
+        if posting is None:
+            posting = index[key] = _Series()
+        posting.append(ticks, animal_id)
+
+    def _build_indexes(self) -> None:
+        """После загрузки индексы строятся одним проходом при первом агрегирующем запросе."""
+        self._indexes_ready = True
+        for animal_id, timeline in self._timelines.items():
+            for ticks, details in zip(timeline.times, timeline.items):
+                self._index_visit(animal_id, ticks, details)
+
+    def forget(self, animal_id: int) -> int:
+        """Удаляет историю животного за O(его визитов): записи в индексах остаются как удалённые
+        и отбрасываются запросами, а когда их больше, чем живых визитов, индексы пересобираются."""
+        timeline = self._timelines.pop(animal_id, None)
+        if timeline is None:
+            return 0
+        self._count -= len(timeline)
+        if self._indexes_ready:
+            self._forgotten[animal_id] = timeline
+            self._stale += len(timeline)
+            if self._stale > self._count:
+                self._compact()
+        return len(timeline)
+
+    def _compact(self) -> None:
+        self._by_status.clear()
+        self._by_diagnosis.clear()
+        self._status_names.clear()
+        self._forgotten.clear()
+        self._stale = 0
+        self._build_indexes()
+
+    def _purge(self, animal_id: int) -> None:
+        """Перед новыми визитами под забытым ID убирает его старые записи из индексов."""
+        timeline = self._forgotten.pop(animal_id)
+        self._stale -= len(timeline)
+        for index, keys in ((self._by_diagnosis, {_casefold(d) for d, _, _, _ in timeline.items}),
+                            (self._by_status, {_casefold(s) for _, _, _, s in timeline.items if s is not None})):
+            for key in keys:
+                index[key].discard(animal_id)
+                if not index[key]:
+                    del index[key]
+                    if index is self._by_status:
+                        del self._status_names[key]
+
+    @staticmethod
+    def _visit(ticks: int, details: tuple) -> Visit:
+        return Visit(_from_ticks(ticks), *details)
+
+    def last(self, animal_id: int, n: int = 10) -> List[Visit]:
+        """Последние n визитов, начиная с самого свежего."""
+        timeline = self._timelines.get(animal_id)
+        if timeline is None or n <= 0:
+            return []
+        _, hi = timeline.span(None, None)
+        lo = max(0, hi - n)
+        return [self._visit(timeline.times[i], timeline.items[i]) for i in range(hi - 1, lo - 1, -1)]
+
+    def between(self, animal_id: int, start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> List[Visit]:
+        """Визиты в интервале [start, end] в хронологическом порядке."""
+        timeline = self._timelines.get(animal_id)
+        if timeline is None:
+            return []
+        lo, hi = timeline.span(self._bound(start), self._bound(end))
+        return [self._visit(timeline.times[i], timeline.items[i]) for i in range(lo, hi)]
+
+    def visits(self, animal_id: int) -> List[Visit]:
+        return self.between(animal_id)
+
+    @staticmethod
+    def _bound(timestamp: Optional[datetime]) -> Optional[int]:
+        return None if timestamp is None else _ticks(timestamp)
+
+    def _window(self, index: Dict[str, _Series], value: str, start: Optional[int],
+                end: Optional[int]) -> Set[int]:
+        if not self._indexes_ready:
+            self._build_indexes()
+        posting = index.get(_casefold(value))
+        if posting is None:
+            return set()
+        lo, hi = posting.span(start, end)
+        return set(posting.items[lo:hi]).difference(self._forgotten)
+
+    def animals_with(self, status: Optional[str] = None, diagnosis: Optional[str] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[int]:
+        """ID животных, у которых в интервале был визит с таким статусом и/или диагнозом."""
+        if status is None and diagnosis is None:
+            raise InvalidAnimalDataError("Укажите статус или диагноз для поиска по истории")
+        start, end = self._bound(since), self._bound(until)
+        found: Optional[Set[int]] = None
+        for index, value in ((self._by_status, status), (self._by_diagnosis, diagnosis)):
+            if value is not None:
+                ids = self._window(index, value, start, end)
+                found = ids if found is None else found & ids
+        return sorted(found)
+
+    def recent_animals(self, status: Optional[str] = None, diagnosis: Optional[str] = None,
+                       days: int = DEFAULT_RECENT_DAYS, now: Optional[datetime] = None) -> List[int]:
+        now = datetime.now() if now is None else now
+        return self.animals_with(status, diagnosis, since=now - timedelta(days=days), until=now)
+
+    def status_counts(self, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> Dict[str, int]:
+        """Число разных животных по каждому статусу за интервал."""
+        if not self._indexes_ready:
+            self._build_indexes()
+        start, end = self._bound(since), self._bound(until)
+        counts = {}
+        for key, posting in self._by_status.items():
+            lo, hi = posting.span(start, end)
+            count = len(set(posting.items[lo:hi]).difference(self._forgotten))
+            if count:
+                counts[self._status_names[key]] = count
+        return counts
+
+    def __iter__(self) -> Iterator[Tuple[int, Visit]]:
+        for animal_id, ticks, details in self._entries():
+            yield animal_id, self._visit(ticks, details)
+
+    def _entries(self) -> Iterator[Tuple[int, int, tuple]]:
+        for animal_id in sorted(self._timelines):
+            timeline = self._timelines[animal_id]
+            timeline.span(None, None)
+            yield from zip(itertools.repeat(animal_id), timeline.times, timeline.items)
+
+    def save_to_jsonl(self, filename: str) -> None:
+        # детали визитов повторяются, поэтому каждый кортеж кодируется в JSON один раз
+        encoded: Dict[tuple, str] = {}
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                for animal_id, ticks, details in self._entries():
+                    tail = encoded.get(details)
+                    if tail is None:
+                        record = dict(zip(VISIT_FIELDS, details))
+                        if details[3] is not None:
+                            record['status'] = details[3]
+                        tail = encoded[details] = json.dumps(record, ensure_ascii=False)[1:]
+                    f.write(f'{{"animal_id": {animal_id}, "timestamp": "{_from_ticks(ticks).isoformat()}", {tail}\n')
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при сохранении истории в JSON: {str(e)}")
+
+    def load_from_jsonl(self, filename: str) -> None:
+        history = MedicalHistory()
+        history._indexes_ready = False
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        data = json.loads(line)
+                        history._load_entry(data['animal_id'], data['timestamp'], data['diagnosis'],
+                                            data['treatment'], data['vet'], data.get('status'))
+                    except (ValueError, KeyError, TypeError, AnimalError) as e:
+                        raise FileOperationError(f"строка {number}: {str(e)}")
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при загрузке истории из JSON: {str(e)}")
+        self._take(history)
+
+    def _load_entry(self, animal_id: Any, timestamp: str, *details: Optional[str]) -> None:
+        if not isinstance(animal_id, int) or animal_id <= 0:
+            raise InvalidAnimalDataError("ID должно быть положительным целым числом")
+        self._append(animal_id, _ticks(datetime.fromisoformat(timestamp)), self._details(*details))
+
+    def save_to_xml(self, filename: str) -> None:
+        encoded: Dict[tuple, str] = {}
+        try:
+            with open(filename, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='\n') as f:
+                f.write("<?xml version='1.0' encoding='utf-8'?>\n<medical_history>")
+                for animal_id, ticks, details in self._entries():
+                    body = encoded.get(details)
+                    if body is None:
+                        body = ''.join(_xml_field(field, value) for field, value in zip(VISIT_FIELDS, details))
+                        if details[3] is not None:
+                            body += _xml_field('status', details[3])
+                        body = encoded[details] = body + '</visit>'
+                    f.write(f'<visit animal_id="{animal_id}"><timestamp>{_from_ticks(ticks).isoformat()}</timestamp>')
+                    f.write(body)
+                f.write("</medical_history>")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при сохранении истории в XML: {str(e)}")
+
+    def load_from_xml(self, filename: str) -> None:
+        history = MedicalHistory()
+        history._indexes_ready = False
+        try:
+            root = None
+            for event, elem in ET.iterparse(filename, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    continue
+                if elem.tag != 'visit':
+                    continue
+                fields = {child.tag: child.text for child in elem}
+                try:
+                    history._load_entry(int(elem.get('animal_id')), fields['timestamp'],
+                                        *(fields.get(field) for field in VISIT_FIELDS), fields.get('status'))
+                except (ValueError, KeyError, TypeError, AnimalError) as e:
+                    raise FileOperationError(f"визит {len(history) + 1}: {str(e)}")
+                root.clear()
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при загрузке истории из XML: {str(e)}")
+        self._take(history)
+
+    def _take(self, other: 'MedicalHistory') -> None:
+        self._timelines = other._timelines
+        self._by_status = other._by_status
+        self._by_diagnosis = other._by_diagnosis
+        self._status_names = other._status_names
+        self._known_details = other._known_details
+        self._forgotten = other._forgotten
+        self._stale = other._stale
+        self._count = other._count
+        self._indexes_ready = other._indexes_ready
+
+
+def history_filename(filename: str) -> str:
+    """animals.json -> animals.history.jsonl, animals.xml -> animals.history.xml"""
+    base, extension = os.path.splitext(filename)
+    return base + ('.history.xml' if extension.lower() == '.xml' else '.history.jsonl')
+
+
+class MedicalPetClinic(PetClinic):
+    """Клиника с историей визитов; история сохраняется и загружается рядом с основным файлом."""
+
+    def __init__(self, metrics=None):
+        super().__init__(metrics)
+        self.history = MedicalHistory()
+
+    def record_visit(self, animal_id: int, timestamp: datetime, diagnosis: str, treatment: str, vet: str,
+                     status: Optional[str] = None) -> Visit:
+        """Добавляет визит; статус визита становится текущим состоянием здоровья животного."""
+        animal = self._animals.get(animal_id)
+        if animal is None:
+            raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+        visit = Visit(timestamp, diagnosis, treatment, vet, status)
+        self.history.record(animal_id, visit)
+        if status is not None and status != animal.health_status:
+            latest, = self.history.last(animal_id, 1)
+            if latest.timestamp == visit.timestamp:
+                animal.health_status = status
+                self.reindex_animal(animal_id)
+        return visit
+
+    def remove_animal(self, animal_id: int) -> bool:
+        removed = super().remove_animal(animal_id)
+        self.history.forget(animal_id)
+        return removed
+
+    def _clear(self) -> None:
+        super()._clear()
+        self.history.clear()
+
+    def _load_history(self, filename: str, xml: bool) -> None:
+        path = history_filename(filename)
+        if not os.path.exists(path):
+            return
+        if xml:
+            self.history.load_from_xml(path)
+        else:
+            self.history.load_from_jsonl(path)
+
+    def save_to_json(self, filename: str) -> None:
+        super().save_to_json(filename)
+        self.history.save_to_jsonl(history_filename(filename))
+
+    def load_from_json(self, filename: str) -> None:
+        super().load_from_json(filename)
+        self._load_history(filename, xml=False)
+
+    def load_from_json_stream(self, filename: str, progress: Optional[ProgressCallback] = None,
+                              chunk_size: int = JSON_CHUNK_SIZE, trusted: bool = False) -> dict:
+        metadata = super().load_from_json_stream(filename, progress, chunk_size, trusted)
+        self._load_history(filename, xml=False)
+        return metadata
+
+    def save_to_xml(self, filename: str) -> None:
+        super().save_to_xml(filename)
+        self.history.save_to_xml(history_filename(filename))
+
+    def load_from_xml(self, filename: str) -> None:
+        super().load_from_xml(filename)
+        self._load_history(filename, xml=True)
+
+    def load_from_xml_stream(self, filename: str, progress: Optional[ProgressCallback] = None,
+                             trusted: bool = False) -> dict:
+        metadata = super().load_from_xml_stream(filename, progress, trusted)
+        self._load_history(filename, xml=True)
+        return metadata
@@ -0,0 +1,187 @@
+"""Журналируемая клиника: журнал изменений поверх бинарного снимка"""
+
+import json
+import os
+from typing import Any, Callable, Iterable, Optional, Union
+
+from main import (JSON_CHUNK_SIZE, Animal, AnimalError, BulkImportReport, FileOperationError, PetClinic,
+                  ProgressCallback)
+from snapshot import load_snapshot_into, save_snapshot
+
+
+SNAPSHOT_NAME = 'clinic.snap'
+LOG_NAME = 'clinic.log'
+
+
+class JournaledPetClinic(PetClinic):
+    def __init__(self, directory: str, sync_every: int = 1, compact_after: int = 100_000):
+        super().__init__()
+        self.directory = directory
+        self.sync_every = sync_every
+        self.compact_after = compact_after
+        self._snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self._log_path = os.path.join(directory, LOG_NAME)
+        self._log = None
+        self._unsynced = 0
+        self._log_entries = 0
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            raise FileOperationError(f"Ошибка при создании каталога журнала: {str(e)}")
+        self._recover()
+        self._log = open(self._log_path, 'ab')
+
+    def __enter__(self) -> 'JournaledPetClinic':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _recover(self) -> None:
+        if os.path.exists(self._snapshot_path):
+            load_snapshot_into(self, self._snapshot_path)
+        if not os.path.exists(self._log_path):
+            return
+
+        valid_size = 0
+        try:
+            with open(self._log_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    self._replay(json.loads(line))
+                    valid_size += len(line)
+                    self._log_entries += 1
+        except (ValueError, KeyError, AnimalError) as e:
+            raise FileOperationError(f"Журнал {self._log_path} повреждён: {str(e)}")
+
+        if valid_size != os.path.getsize(self._log_path):
+            with open(self._log_path, 'rb+') as f:
+                f.truncate(valid_size)
+        self._update_next_id()
+
+    def _replay(self, entry: dict) -> None:
+        if entry['op'] == 'put':
+            animal = Animal.from_dict(entry['animal'], trusted=True)
+            self._discard(animal.animal_id)
+            self._insert(animal)
+        elif entry['op'] == 'remove':
+            self._discard(entry['animal_id'])
+        else:
+            raise KeyError(entry['op'])
+
+    def _append(self, *entries: dict) -> None:
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        self._log.write(lines.encode('utf-8'))
+        self._log_entries += len(entries)
+        self._unsynced += len(entries)
+        if self.sync_every and self._unsynced >= self.sync_every:
+            self.sync()
+
+    def _maybe_compact(self) -> None:
+        if self.compact_after and self._log_entries >= self.compact_after:
+            self.compact()
+
+    def sync(self) -> None:
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def compact(self) -> None:
+        try:
+            temp_path = self._snapshot_path + '.tmp'
+            save_snapshot(self, temp_path)
+            with open(temp_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._snapshot_path)
+
+            self._log.close()
+            self._log = open(self._log_path, 'wb')
+            self._log_entries = 0
+            self._unsynced = 0
+        except OSError as e:
+            raise FileOperationError(f"Ошибка при сжатии журнала: {str(e)}")
+
+    def close(self) -> None:
+        if self._log is not None and not self._log.closed:
+            self.sync()
+            self._log.close()
+
+    def add_animal(self, animal: Animal) -> None:
+        super().add_animal(animal)
+        try:
+            self._append({'op': 'put', 'animal': animal.to_dict()})
+        except Exception as e:
+            self._discard(animal.animal_id)
+            raise FileOperationError(f"Ошибка при записи в журнал: {str(e)}")
+        self._maybe_compact()
+
+    def remove_animal(self, animal_id: int) -> bool:
+        animal = self.find_animal_by_id(animal_id)
+        super().remove_animal(animal_id)
+        try:
+            self._append({'op': 'remove', 'animal_id': animal_id})
+        except Exception as e:
+            self._insert(animal)
+            raise FileOperationError(f"Ошибка при записи в журнал: {str(e)}")
+        self._maybe_compact()
+        return True
+
+    def reindex_animal(self, animal_id: int) -> None:
+        super().reindex_animal(animal_id)
+        try:
+            self._append({'op': 'put', 'animal': self.find_animal_by_id(animal_id).to_dict()})
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при записи в журнал: {str(e)}")
+        self._maybe_compact()
+
+    def add_many(self, items: Iterable[Union[Animal, dict]], atomic: bool = True,
+                 trusted: bool = False, defer_indexing: bool = False) -> BulkImportReport:
+        items = list(items)
+        report = super().add_many(items, atomic, trusted, defer_indexing)
+        if not report.added:
+            return report
+        if self.compact_after and report.added >= self.compact_after:
+            # Пакет сравним с порогом сжатия: один снимок дешевле такого же числа записей в журнал
+            self.compact()
+            return report
+
+        rejected = {issue.index for issue in report.issues}
+        added = [self._animals[item.animal_id if isinstance(item, Animal) else item['animal_id']]
+                 for index, item in enumerate(items) if index not in rejected]
+        try:
+            self._append(*({'op': 'put', 'animal': animal.to_dict()} for animal in added))
+        except Exception as e:
+            for animal in added:
+                self._discard(animal.animal_id)
+            raise FileOperationError(f"Ошибка при записи в журнал: {str(e)}")
+        self._maybe_compact()
+        return report
+
+    def _replace_from(self, load: Callable[..., Any], *args: Any) -> Any:
+        try:
+            result = load(*args)
+        except AnimalError:
+            self._log.close()
+            self._clear()
+            self._log_entries = 0
+            self._recover()
+            self._log = open(self._log_path, 'ab')
+            raise
+        self.compact()
+        return result
+
+    def load_from_json(self, filename: str) -> None:
+        self._replace_from(super().load_from_json, filename)
+
+    def load_from_xml(self, filename: str) -> None:
+        self._replace_from(super().load_from_xml, filename)
+
+    def load_from_json_stream(self, filename: str, progress: Optional[ProgressCallback] = None,
+                              chunk_size: int = JSON_CHUNK_SIZE, trusted: bool = False) -> dict:
+        return self._replace_from(super().load_from_json_stream, filename, progress, chunk_size, trusted)
+
+    def load_from_xml_stream(self, filename: str, progress: Optional[ProgressCallback] = None,
+                             trusted: bool = False) -> dict:
+        return self._replace_from(super().load_from_xml_stream, filename, progress, trusted)
@@ -0,0 +1,197 @@
+"""Ленивая загрузка: индекс смещений и материализация животных по запросу"""
+
+import json
+import mmap
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from main import Animal, FileOperationError, PetClinic, _animal_from_xml_fields
+
+
+DEFAULT_CACHE_SIZE = 1024
+
+_JSON_ANIMAL = re.compile(rb'\{\s*"type"\s*:\s*"\w+"\s*,\s*"animal_id"\s*:\s*(\d+)')
+_JSON_ANIMALS_START = re.compile(rb'"animals"\s*:\s*\[')
+_JSON_ANIMALS_END = re.compile(rb'\]\s*,\s*"metadata"|\]\s*\}\s*$')
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+_JSON_ID = re.compile(rb'"animal_id"\s*:\s*(\d+)')
+_XML_ANIMAL = re.compile(rb'<animal[\s>]')
+_XML_ANIMAL_END = b'</animal>'
+_XML_ID = re.compile(rb'<animal_id>\s*(\d+)\s*</animal_id>')
+_COUNT_CHUNK = 16 * 1024 * 1024
+
+
+def _count(data: mmap.mmap, needle: bytes, start: int, end: int) -> int:
+    """bytes.count по участку mmap кусками, чтобы не копировать весь файл."""
+    total = 0
+    for chunk_start in range(start, end, _COUNT_CHUNK):
+        total += data[chunk_start:min(end, chunk_start + _COUNT_CHUNK + len(needle) - 1)].count(needle)
+    return total
+
+
+class LazyPetClinic:
+    def __init__(self, filename: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.filename = filename
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[int, Animal]' = OrderedDict()
+        self._offsets: Dict[int, Tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            with open(filename, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except (OSError, ValueError) as e:
+            raise FileOperationError(f"Ошибка при открытии {filename}: {str(e)}")
+
+        self._is_xml = self._mmap[:64].lstrip().startswith(b'<')
+        try:
+            self._build_offsets()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'LazyPetClinic':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._cache.clear()
+        self._mmap.close()
+
+    def _build_offsets(self) -> None:
+        if self._is_xml:
+            self._build_xml_offsets()
+        else:
+            self._build_json_offsets()
+
+    def _build_xml_offsets(self) -> None:
+        data = self._mmap
+        position = 0
+        while True:
+            match = _XML_ANIMAL.search(data, position)
+            if match is None:
+                return
+            end = data.find(_XML_ANIMAL_END, match.end())
+            if end < 0:
+                raise FileOperationError("Ошибка при загрузке из XML: незакрытый элемент animal")
+            position = end + len(_XML_ANIMAL_END)
+            self._add_offset(self._record_id(_XML_ID, match.start(), position), match.start(), position)
+
+    def _build_json_offsets(self) -> None:
+        """Быстрый путь ищет записи нашего писателя ("type", затем "animal_id") одним регулярным выражением.
+
+        Если в массиве animals объектов или ключей animal_id больше, чем найденных записей (другой
+        порядок ключей, ручная правка), границы записей ищутся разбором структуры массива.
+        """
+        data = self._mmap
+        array = _JSON_ANIMALS_START.search(data)
+        if array is None:
+            raise FileOperationError("Ошибка при загрузке из JSON: не найден список animals")
+
+        starts = [(int(match.group(1)), match.start()) for match in _JSON_ANIMAL.finditer(data, array.end())]
+        tail = _JSON_ANIMALS_END.search(data, starts[-1][1] if starts else array.end())
+        if tail is not None and _count(data, b'{', array.end(), tail.start()) == len(starts) \
+                and _count(data, b'"animal_id"', array.end(), tail.start()) == len(starts):
+            ends = [start for _, start in starts[1:]] + [tail.start()]
+            for (animal_id, start), end in zip(starts, ends):
+                self._add_offset(animal_id, start, end)
+            return
+
+        self._offsets.clear()
+        for start, end in self._scan_json_records(array.end() - 1):
+            self._add_offset(self._record_id(_JSON_ID, start, end), start, end)
+
+    def _scan_json_records(self, position: int) -> Iterator[Tuple[int, int]]:
+        depth = 0
+        record_start = 0
+        for match in _JSON_TOKEN.finditer(self._mmap, position):
+            token = match.group()
+            if token[0] == 0x22:
+                continue
+            if token in (b'{', b'['):
+                if depth == 1:
+                    if token == b'[':
+                        raise FileOperationError("Ошибка при загрузке из JSON: в списке animals не объект")
+                    record_start = match.start()
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                yield record_start, match.end()
+            elif depth == 0:
+                return
+        raise FileOperationError("Ошибка при загрузке из JSON: не найден конец списка animals")
+
+    def _record_id(self, pattern: 're.Pattern[bytes]', start: int, end: int) -> int:
+        match = pattern.search(self._mmap, start, end)
+        if match is None:
+            raise FileOperationError(f"Запись по смещению {start} не содержит animal_id")
+        return int(match.group(1))
+
+    def _add_offset(self, animal_id: int, start: int, end: int) -> None:
+        if animal_id in self._offsets:
+            raise FileOperationError(f"Животное с ID {animal_id} встречается в файле несколько раз")
+        self._offsets[animal_id] = (start, end)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, animal_id: int) -> bool:
+        return animal_id in self._offsets
+
+    def ids(self) -> List[int]:
+        return list(self._offsets)
+
+    def _materialize(self, animal_id: int, start: int, end: int) -> Animal:
+        raw = self._mmap[start:end]
+        try:
+            if self._is_xml:
+                elem = ET.fromstring(raw)
+                animal = _animal_from_xml_fields(elem.get('type'), {child.tag: child.text for child in elem})
+            else:
+                data, _ = json.JSONDecoder().raw_decode(raw.decode('utf-8'))
+                animal = Animal.from_dict(data)
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при чтении животного с ID {animal_id}: {str(e)}")
+        if animal.animal_id != animal_id:
+            raise FileOperationError(f"Смещение для ID {animal_id} указывает на другое животное")
+        return animal
+
+    def find_animal_by_id(self, animal_id: int) -> Optional[Animal]:
+        animal = self._cache.get(animal_id)
+        if animal is not None:
+            self.hits += 1
+            self._cache.move_to_end(animal_id)
+            return animal
+
+        offsets = self._offsets.get(animal_id)
+        if offsets is None:
+            return None
+        self.misses += 1
+        animal = self._materialize(animal_id, *offsets)
+        if self.cache_size > 0:
+            self._cache[animal_id] = animal
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return animal
+
+    @property
+    def animals(self) -> Iterator[Animal]:
+        for animal_id, offsets in self._offsets.items():
+            cached = self._cache.get(animal_id)
+            yield cached if cached is not None else self._materialize(animal_id, *offsets)
+
+    def to_clinic(self) -> PetClinic:
+        clinic = PetClinic()
+        report = clinic.add_many(self.animals)
+        if not report.ok:
+            raise FileOperationError(f"Ошибка при загрузке {self.filename}: {report.issues[0].error}")
+        return clinic
+
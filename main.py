@@ -1,11 +1,20 @@
 """Лабораторная работа №1. Вариант 15: Система учета домашних животных"""
 
+import codecs
+import csv
+import functools
 import json
+import keyword
+import os
+import time
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Union, ValuesView
 from datetime import datetime
 
+from metrics import NO_METRICS, Instrumentation
+
 
 class AnimalError(Exception):
     pass
@@ -23,7 +32,22 @@ class FileOperationError(AnimalError):
     pass
 
 
+DOG_SIZES = ("Маленький", "Средний", "Большой")
+HEALTH_STATUSES = ("Здоров", "Здорова", "Болен", "Больна", "На лечении")
+
+_VALID_DOG_SIZES = frozenset(DOG_SIZES)
+_CANONICAL_VALUES = {value: value for value in DOG_SIZES + HEALTH_STATUSES}
+
+
+# Запись в обход Animal.__setattr__: при построении объекта кэш фрагментов ещё пуст, сбрасывать нечего.
+_set_attribute = object.__setattr__
+
+
 class Animal(ABC):
+    """Животное; любое изменение атрибута сбрасывает кэш сериализованных фрагментов (_fragments)."""
+
+    __slots__ = ('animal_id', 'name', 'age', 'breed', 'owner', 'health_status', '_fragments')
+
     def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str, health_status: str = "Здоров"):
         self._validate_positive_int(animal_id, "ID")
         self._validate_positive_int(age, "Возраст")
@@ -31,12 +55,29 @@ class Animal(ABC):
         self._validate_string(breed, "Порода")
         self._validate_string(owner, "Владелец")
 
-        self.animal_id = animal_id
-        self.name = name
-        self.age = age
-        self.breed = breed
-        self.owner = owner
-        self.health_status = health_status
+        self._assign(animal_id, name, age, breed, owner, health_status)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        _set_attribute(self, name, value)
+        _set_attribute(self, '_fragments', None)
+
+    def _assign(self, animal_id: int, name: str, age: int, breed: str, owner: str, health_status: str) -> None:
+        _set_animal_id(self, animal_id)
+        _set_name(self, name)
+        _set_age(self, age)
+        _set_breed(self, breed)
+        _set_owner(self, owner)
+        _set_health_status(self, _CANONICAL_VALUES.get(health_status, health_status))
+
+    def _fragment(self, kind: str, encode: Callable[['Animal'], str]) -> str:
+        fragments = getattr(self, '_fragments', None)
+        if fragments is None:
+            fragments = {}
+            _set_attribute(self, '_fragments', fragments)
+        fragment = fragments.get(kind)
+        if fragment is None:
+            fragment = fragments[kind] = encode(self)
+        return fragment
 
     def _validate_positive_int(self, value: int, field_name: str):
         if not isinstance(value, int) or value <= 0:
@@ -56,96 +97,66 @@ class Animal(ABC):
         pass
 
     def to_dict(self) -> dict:
-        return {
-            'type': self.__class__.__name__,
-            'animal_id': self.animal_id,
-            'name': self.name,
-            'age': self.age,
-            'breed': self.breed,
-            'owner': self.owner,
-            'health_status': self.health_status,
-            **self._specific_attributes()
-        }
-
-    @abstractmethod
-    def _specific_attributes(self) -> dict:
-        pass
+        return self._schema.to_dict(self)
 
     @classmethod
-    def from_dict(cls, data: dict) -> 'Animal':
-        animal_type = data.get('type')
-        if animal_type == 'Dog':
-            return Dog.from_dict(data)
-        elif animal_type == 'Cat':
-            return Cat.from_dict(data)
-        elif animal_type == 'Bird':
-            return Bird.from_dict(data)
+    def from_dict(cls, data: dict, trusted: bool = False) -> 'Animal':
+        if cls is Animal:
+            schema = SPECIES.get(data.get('type'))
+            if schema is None:
+                raise InvalidAnimalDataError(f"Неизвестный тип животного: {data.get('type')}")
+            cls = schema.cls
         else:
-            raise InvalidAnimalDataError(f"Неизвестный тип животного: {animal_type}")
+            schema = cls._schema
+        return schema.decode_trusted(data, cls) if trusted else schema.decode(data, cls)
+
+
+# Дескрипторы слотов: запись через них заметно дешевле вызова object.__setattr__ на горячем пути загрузки.
+_set_animal_id = Animal.animal_id.__set__
+_set_name = Animal.name.__set__
+_set_age = Animal.age.__set__
+_set_breed = Animal.breed.__set__
+_set_owner = Animal.owner.__set__
+_set_health_status = Animal.health_status.__set__
 
 
 class Dog(Animal):
+    __slots__ = ('dog_size',)
+
     def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str,
                  health_status: str = "Здоров", dog_size: str = "Средний"):
         super().__init__(animal_id, name, age, breed, owner, health_status)
         self._validate_dog_size(dog_size)
-        self.dog_size = dog_size
+        _set_attribute(self, 'dog_size', _CANONICAL_VALUES[dog_size])
 
     def _validate_dog_size(self, size: str):
-        valid_sizes = ["Маленький", "Средний", "Большой"]
-        if size not in valid_sizes:
-            raise InvalidAnimalDataError(f"Размер собаки должен быть одним из: {valid_sizes}")
+        if size not in _VALID_DOG_SIZES:
+            raise InvalidAnimalDataError(f"Размер собаки должен быть одним из: {list(DOG_SIZES)}")
 
     def make_sound(self) -> str:
         return "Гав! Гав!"
 
-    def _specific_attributes(self) -> dict:
-        return {'dog_size': self.dog_size}
-
-    @classmethod
-    def from_dict(cls, data: dict) -> 'Dog':
-        return cls(
-            animal_id=data['animal_id'],
-            name=data['name'],
-            age=data['age'],
-            breed=data['breed'],
-            owner=data['owner'],
-            health_status=data.get('health_status', 'Здоров'),
-            dog_size=data.get('dog_size', 'Средний')
-        )
-
 
 class Cat(Animal):
+    __slots__ = ('is_indoor',)
+
     def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str,
                  health_status: str = "Здоров", is_indoor: bool = True):
         super().__init__(animal_id, name, age, breed, owner, health_status)
-        self.is_indoor = bool(is_indoor)
+        _set_attribute(self, 'is_indoor', bool(is_indoor))
 
     def make_sound(self) -> str:
         return "Мяу! Мяу!"
 
-    def _specific_attributes(self) -> dict:
-        return {'is_indoor': self.is_indoor}
-
-    @classmethod
-    def from_dict(cls, data: dict) -> 'Cat':
-        return cls(
-            animal_id=data['animal_id'],
-            name=data['name'],
-            age=data['age'],
-            breed=data['breed'],
-            owner=data['owner'],
-            health_status=data.get('health_status', 'Здоров'),
-            is_indoor=data.get('is_indoor', True)
-        )
-
 
 class Bird(Animal):
+    __slots__ = ('wingspan',)
+
     def __init__(self, animal_id: int, name: str, age: int, breed: str, owner: str,
                  health_status: str = "Здоров", wingspan: float = 0.0):
         super().__init__(animal_id, name, age, breed, owner, health_status)
         self._validate_wingspan(wingspan)
-        self.wingspan = wingspan
+        _set_attribute(self, 'wingspan', wingspan)
 
     def _validate_wingspan(self, wingspan: float):
         if not isinstance(wingspan, (int, float)) or wingspan < 0:
@@ -154,53 +165,588 @@ class Bird(Animal):
     def make_sound(self) -> str:
         return "Чик-чирик!"
 
-    def _specific_attributes(self) -> dict:
-        return {'wingspan': self.wingspan}
 
-    @classmethod
-    def from_dict(cls, data: dict) -> 'Bird':
-        return cls(
-            animal_id=data['animal_id'],
-            name=data['name'],
-            age=data['age'],
-            breed=data['breed'],
-            owner=data['owner'],
-            health_status=data.get('health_status', 'Здоров'),
-            wingspan=data.get('wingspan', 0.0)
-        )
+class FieldKind(NamedTuple):
+    check: str      # условие ошибки для значения {v}; пусто, если проверки нет
+    convert: str    # нормализация значения {v} перед записью в слот
+    parse: str      # разбор текста {t} из XML или CSV
+    message: str    # текст ошибки; {label} и {options} подставляются при регистрации
+
+
+FIELD_KINDS: Dict[str, FieldKind] = {
+    'positive_int': FieldKind("not isinstance({v}, int) or {v} <= 0", "{v}", "int({t})",
+                              "{label} должен быть положительным целым числом"),
+    'text': FieldKind("not isinstance({v}, str) or not {v}.strip()", "{v}", "{t}", "{label} не может быть пустым"),
+    'status': FieldKind("", "canonical.get({v}, {v})", "{t}", ""),
+    'choice': FieldKind("{v} not in {choices}", "canonical.get({v}, {v})", "{t}",
+                        "{label} должен быть одним из: {options}"),
+    'bool': FieldKind("", "bool({v})", "{t}.lower() == 'true'", ""),
+    'non_negative': FieldKind("not isinstance({v}, (int, float)) or {v} < 0", "{v}", "float({t})",
+                              "{label} должен быть неотрицательным числом"),
+}
+
+_REQUIRED = object()
+
+
+class Field(NamedTuple):
+    name: str
+    kind: str
+    label: str = ''
+    default: Any = _REQUIRED
+    choices: tuple = ()
+
+
+ANIMAL_FIELDS = (
+    Field('animal_id', 'positive_int', "ID"),
+    Field('name', 'text', "Имя"),
+    Field('age', 'positive_int', "Возраст"),
+    Field('breed', 'text', "Порода"),
+    Field('owner', 'text', "Владелец"),
+    Field('health_status', 'status', default="Здоров"),
+)
+
+# Проверки идут в порядке Animal.__init__, чтобы при нескольких ошибках сообщалась та же, что и раньше.
+_CHECK_ORDER = {name: position for position, name in enumerate(('animal_id', 'age', 'name', 'breed', 'owner'))}
+
+
+class SpeciesSchema:
+    """Поля вида и сгенерированные по ним кодеки: словарь, текст XML/CSV и фрагмент XML."""
+
+    def __init__(self, cls: type, fields: Iterable[Field], type_name: Optional[str] = None):
+        self.cls = cls
+        self.type_name = type_name or cls.__name__
+        self.fields = ANIMAL_FIELDS + tuple(fields)
+        for field in self.fields:
+            if not field.name.isidentifier() or keyword.iskeyword(field.name):
+                raise InvalidAnimalDataError(f"Недопустимое имя поля: {field.name!r}")
+            if field.kind not in FIELD_KINDS:
+                raise InvalidAnimalDataError(f"Неизвестный вид поля {field.kind} у {field.name}")
+        self._checks = sorted(range(len(self.fields)),
+                              key=lambda index: _CHECK_ORDER.get(self.fields[index].name, len(_CHECK_ORDER)))
+        self._compile()
+
+    def _fetch(self, index: int, field: Field, text: bool) -> str:
+        value = f"source[{field.name!r}]"
+        if text:
+            value = FIELD_KINDS[field.kind].parse.format(t=value)
+        if field.default is _REQUIRED:
+            return value
+        if text:
+            return f"{value} if {field.name!r} in source else default_{index}"
+        return f"source.get({field.name!r}, default_{index})"
+
+    def _decoder(self, name: str, text: bool, validate: bool) -> str:
+        lines = [f"def {name}(source, cls=schema_cls):"]
+        for index, field in enumerate(self.fields):
+            lines.append(f"    v{index} = {self._fetch(index, field, text)}")
+        if validate:
+            for index in self._checks:
+                check = FIELD_KINDS[self.fields[index].kind].check
+                if check:
+                    lines.append(f"    if {check.format(v=f'v{index}', choices=f'choices_{index}')}:")
+                    lines.append(f"        raise error(message_{index})")
+        lines.append("    animal = new(cls)")
+        for index, field in enumerate(self.fields):
+            lines.append(f"    set_{index}(animal, {FIELD_KINDS[field.kind].convert.format(v=f'v{index}')})")
+        lines.append("    return animal")
+        return '\n'.join(lines)
+
+    def _compile(self) -> None:
+        namespace: Dict[str, Any] = {
+            'schema_cls': self.cls,
+            'new': object.__new__,
+            'error': InvalidAnimalDataError,
+            'canonical': _CANONICAL_VALUES,
+            'xml_field': _xml_field,
+        }
+        for index, field in enumerate(self.fields):
+            kind = FIELD_KINDS[field.kind]
+            namespace[f'set_{index}'] = getattr(self.cls, field.name).__set__
+            namespace[f'default_{index}'] = field.default
+            namespace[f'choices_{index}'] = frozenset(field.choices)
+            namespace[f'message_{index}'] = kind.message.format(label=field.label, options=list(field.choices))
+
+        getters = [f"animal.{field.name}" for field in self.fields]
+        type_attribute = escape(self.type_name, {'"': "&quot;"})
+        source = '\n\n'.join([
+            self._decoder('decode', text=False, validate=True),
+            self._decoder('decode_trusted', text=False, validate=False),
+            self._decoder('decode_text', text=True, validate=True),
+            self._decoder('decode_text_trusted', text=True, validate=False),
+            "def to_dict(animal):\n    return {'type': %r, %s}" % (
+                self.type_name, ', '.join(f"{field.name!r}: {getter}" for field, getter in zip(self.fields, getters))),
+            "def to_xml(animal):\n    return ''.join((%r, %s, '</animal>'))" % (
+                f'<animal type="{type_attribute}">',
+                ', '.join(f"xml_field({field.name!r}, {getter})" for field, getter in zip(self.fields, getters))),
+        ])
+        exec(compile(source, f"<schema {self.type_name}>", 'exec'), namespace)
+
+        self.decode = namespace['decode']
+        self.decode_trusted = namespace['decode_trusted']
+        self.decode_text = namespace['decode_text']
+        self.decode_text_trusted = namespace['decode_text_trusted']
+        self.to_dict = namespace['to_dict']
+        self.to_xml = namespace['to_xml']
+
+
+SPECIES: Dict[str, SpeciesSchema] = {}
+
+
+def register_species(cls: type, fields: Iterable[Field] = (), type_name: Optional[str] = None) -> SpeciesSchema:
+    """Регистрирует вид животного: после этого его читают и пишут все форматы клиники."""
+    schema = SpeciesSchema(cls, fields, type_name)
+    cls._schema = schema
+    SPECIES[schema.type_name] = schema
+    return schema
+
+
+def _xml_field(tag: str, value: Any) -> str:
+    text = '' if value is None else escape(str(value))
+    return f"<{tag}>{text}</{tag}>" if text else f"<{tag} />"
+
+
+register_species(Dog, [Field('dog_size', 'choice', "Размер собаки", default="Средний", choices=DOG_SIZES)])
+register_species(Cat, [Field('is_indoor', 'bool', default=True)])
+register_species(Bird, [Field('wingspan', 'non_negative', "Размах крыльев", default=0.0)])
+
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+ProgressCallback = Callable[[int, int, int], None]
+
+
+class _JsonStreamReader:
+    def __init__(self, f, chunk_size: int = JSON_CHUNK_SIZE):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        self.bytes_read += len(chunk)
+        self._eof = not chunk
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk, final=self._eof)
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise InvalidAnimalDataError(f"Ожидался символ '{char}' (прочитано {self.bytes_read} байт)")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_animals_from_json(filename: str, metadata: Optional[dict] = None,
+                           progress: Optional[ProgressCallback] = None,
+                           chunk_size: int = JSON_CHUNK_SIZE, trusted: bool = False) -> Iterator['Animal']:
+    total_bytes = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        reader = _JsonStreamReader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key == 'animals':
+                reader.expect('[')
+                count = 0
+                if reader.peek() != ']':
+                    while True:
+                        yield Animal.from_dict(reader.value(), trusted)
+                        count += 1
+                        if progress is not None:
+                            progress(count, reader.bytes_read, total_bytes)
+                        if reader.peek() != ',':
+                            break
+                        reader.expect(',')
+                reader.expect(']')
+            else:
+                value = reader.value()
+                if key == 'metadata' and metadata is not None:
+                    metadata.update(value)
+            if reader.peek() != ',':
+                break
+            reader.expect(',')
+        reader.expect('}')
+
+
+def _animal_to_json(animal: 'Animal') -> str:
+    return json.dumps(animal.to_dict(), ensure_ascii=False, indent=2).replace('\n', '\n    ')
+
+
+def write_json_stream(f: TextIO, animals: Iterable['Animal'], metadata: dict, cache: bool = False) -> None:
+    """cache=True берёт фрагменты из кэша животных и перекодирует только изменённых."""
+    f.write('{\n  "animals": [')
+    empty = True
+    for animal in animals:
+        f.write('\n    ' if empty else ',\n    ')
+        f.write(animal._fragment('json', _animal_to_json) if cache else _animal_to_json(animal))
+        empty = False
+    f.write(']' if empty else '\n  ]')
+    f.write(',\n  "metadata": ')
+    f.write(json.dumps(metadata, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+    f.write('\n}')
+
+
+def _animal_to_xml(animal: 'Animal') -> str:
+    if isinstance(animal, Animal):
+        return animal._schema.to_xml(animal)
+    fields = animal.to_dict()
+    animal_type = fields.pop('type')
+    body = ''.join(_xml_field(tag, value) for tag, value in fields.items())
+    return f'<animal type="{escape(animal_type, {chr(34): "&quot;"})}">{body}</animal>'
+
+
+def write_xml_stream(f: TextIO, animals: Iterable['Animal'], metadata: dict, cache: bool = False) -> None:
+    f.write("<?xml version='1.0' encoding='utf-8'?>\n<pet_clinic><metadata>")
+    f.write(''.join(_xml_field(tag, value) for tag, value in metadata.items()))
+    f.write("</metadata><animals")
+    empty = True
+    for animal in animals:
+        fragment = animal._fragment('xml', _animal_to_xml) if cache else _animal_to_xml(animal)
+        f.write(">" + fragment if empty else fragment)
+        empty = False
+    f.write(" /></pet_clinic>" if empty else "</animals></pet_clinic>")
+
+
+def _animal_from_xml_fields(animal_type: Optional[str], fields: Dict[str, Optional[str]],
+                            trusted: bool = False) -> 'Animal':
+    schema = SPECIES.get(animal_type)
+    if schema is None:
+        raise InvalidAnimalDataError(f"Неизвестный тип животного: {animal_type}")
+    return schema.decode_text_trusted(fields) if trusted else schema.decode_text(fields)
+
+
+def iter_animals_from_xml(filename: str, metadata: Optional[dict] = None,
+                          progress: Optional[ProgressCallback] = None, trusted: bool = False) -> Iterator['Animal']:
+    total_bytes = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        parent = None
+        count = 0
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == 'animals':
+                    parent = elem
+                continue
+
+            if elem.tag == 'animal' and parent is not None:
+                yield _animal_from_xml_fields(elem.get('type'), {child.tag: child.text for child in elem}, trusted)
+                parent.clear()
+                count += 1
+                if progress is not None:
+                    progress(count, f.tell(), total_bytes)
+            elif elem.tag == 'metadata' and metadata is not None:
+                metadata.update((child.tag, child.text) for child in elem)
+                if metadata.get('total_animals') is not None:
+                    metadata['total_animals'] = int(metadata['total_animals'])
+
+
+def csv_columns() -> List[str]:
+    columns = ['type'] + [field.name for field in ANIMAL_FIELDS]
+    for schema in SPECIES.values():
+        columns.extend(field.name for field in schema.fields[len(ANIMAL_FIELDS):] if field.name not in columns)
+    return columns
+
+
+def write_csv_stream(f: TextIO, animals: Iterable['Animal']) -> None:
+    writer = csv.DictWriter(f, csv_columns(), restval='')
+    writer.writeheader()
+    for animal in animals:
+        writer.writerow(animal._schema.to_dict(animal))
+
+
+def iter_animals_from_csv(filename: str, trusted: bool = False) -> Iterator['Animal']:
+    with open(filename, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            schema = SPECIES.get(row.get('type'))
+            if schema is None:
+                raise InvalidAnimalDataError(f"Неизвестный тип животного: {row.get('type')}")
+            yield schema.decode_text_trusted(row) if trusted else schema.decode_text(row)
+
+
+def _casefold(value: Any) -> Optional[str]:
+    return value.casefold() if isinstance(value, str) else None
+
+
+INDEX_KEYS = {
+    'owner': lambda animal: _casefold(animal.owner),
+    'breed': lambda animal: _casefold(animal.breed),
+    'species': lambda animal: _casefold(animal.__class__.__name__),
+    'health_status': lambda animal: _casefold(animal.health_status),
+    'is_indoor': lambda animal: getattr(animal, 'is_indoor', None),
+}
+
+
+class ImportIssue(NamedTuple):
+    index: int
+    animal_id: Any
+    error: Exception
+
+
+class BulkImportReport:
+    def __init__(self, added: int, issues: List[ImportIssue]):
+        self.added = added
+        self.issues = issues
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def errors_by_type(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for issue in self.issues:
+            name = issue.error.__class__.__name__
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def __repr__(self) -> str:
+        return f"BulkImportReport(added={self.added}, issues={len(self.issues)})"
+
+
+# публичные методы, которые замеряются при включённых метриках, и направление файлового ввода-вывода
+INSTRUMENTED_METHODS: Dict[str, Optional[str]] = {
+    'add_animal': None,
+    'remove_animal': None,
+    'add_many': None,
+    'find_animal_by_id': None,
+    'find_animals_by_owner': None,
+    'find_animals': None,
+    'save_to_json': 'written',
+    'save_to_xml': 'written',
+    'load_from_json': 'read',
+    'load_from_json_stream': 'read',
+    'load_from_xml': 'read',
+    'load_from_xml_stream': 'read',
+}
+
+
+def _instrumented(method: Callable, operation: str, direction: Optional[str],
+                  metrics: Instrumentation) -> Callable:
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as e:
+            metrics.failure(operation, e)
+            raise
+        finally:
+            metrics.observe(operation, time.perf_counter() - start)
+        if isinstance(result, BulkImportReport):
+            for issue in result.issues:
+                metrics.failure(operation, issue.error)
+        if direction is not None:
+            metrics.transfer(operation, direction, os.path.getsize(kwargs.get('filename') or args[0]))
+        return result
+    return wrapper
 
 
 class PetClinic:
-    def __init__(self):
-        self.animals: List[Animal] = []
+    def __init__(self, metrics: Optional[Instrumentation] = None, cache_fragments: bool = False):
+        # cache_fragments=True держит сериализованные фрагменты при животных (память ~ размер файла),
+        # зато повторное сохранение перекодирует только изменённых; по умолчанию сохранения без кэша.
+        self.cache_fragments = cache_fragments
+        self._animals: Dict[int, Animal] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[int, Animal]]] = {field: {} for field in INDEX_KEYS}
+        self._index_keys: Dict[int, Dict[str, Any]] = {}
+        self._indexes_ready = True
         self._next_id = 1
+        self._metrics = NO_METRICS
+        if metrics is not None:
+            self.metrics = metrics
+
+    @property
+    def metrics(self) -> Instrumentation:
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: Instrumentation) -> None:
+        self._metrics = metrics
+        for name, direction in INSTRUMENTED_METHODS.items():
+            self.__dict__.pop(name, None)
+            if metrics.enabled:
+                setattr(self, name, _instrumented(getattr(self, name), name, direction, metrics))
+
+    @property
+    def animals(self) -> ValuesView[Animal]:
+        return self._animals.values()
+
+    def __len__(self) -> int:
+        return len(self._animals)
+
+    def __contains__(self, animal_id: int) -> bool:
+        return animal_id in self._animals
 
     def _get_next_id(self) -> int:
         current_id = self._next_id
         self._next_id += 1
         return current_id
 
+    def allocate_id(self) -> int:
+        return self._get_next_id()
+
+    def _insert(self, animal: Animal) -> None:
+        if animal.animal_id in self._animals:
+            raise InvalidAnimalDataError(f"Животное с ID {animal.animal_id} уже существует")
+        self._animals[animal.animal_id] = animal
+        self._index_add(animal)
+        if animal.animal_id >= self._next_id:
+            self._next_id = animal.animal_id + 1
+
+    def _discard(self, animal_id: int) -> Optional[Animal]:
+        animal = self._animals.pop(animal_id, None)
+        if animal is not None:
+            self._index_remove(animal_id)
+        return animal
+
+    def _clear(self) -> None:
+        self._animals.clear()
+        self._clear_indexes()
+        self._indexes_ready = True
+
+    def _build_indexes(self) -> None:
+        self._clear_indexes()
+        self._indexes_ready = True
+        for animal in self._animals.values():
+            self._index_add(animal)
+
+    def _clear_indexes(self) -> None:
+        self._index_keys.clear()
+        for index in self._indexes.values():
+            index.clear()
+
+    def _index_add(self, animal: Animal) -> None:
+        if not self._indexes_ready:
+            return
+        keys = {}
+        for field, key_func in INDEX_KEYS.items():
+            key = key_func(animal)
+            if key is None:
+                continue
+            self._indexes[field].setdefault(key, {})[animal.animal_id] = animal
+            keys[field] = key
+        self._index_keys[animal.animal_id] = keys
+
+    def _index_remove(self, animal_id: int) -> None:
+        if not self._indexes_ready:
+            return
+        for field, key in self._index_keys.pop(animal_id, {}).items():
+            posting = self._indexes[field][key]
+            del posting[animal_id]
+            if not posting:
+                del self._indexes[field][key]
+
+    def _posting(self, field: str, value: Any) -> Dict[int, Animal]:
+        if field not in self._indexes:
+            raise InvalidAnimalDataError(f"Поиск по полю {field} не поддерживается")
+        if not self._indexes_ready:
+            self._build_indexes()
+        key = value.casefold() if isinstance(value, str) else value
+        return self._indexes[field].get(key, {})
+
+    def reindex_animal(self, animal_id: int) -> None:
+        if animal_id not in self._animals:
+            raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+        self._index_remove(animal_id)
+        self._index_add(self._animals[animal_id])
+
+    def _replace_all(self, animals: Dict[int, Animal]) -> None:
+        self._clear()
+        self._animals.update(animals)
+        self._indexes_ready = not animals
+        self._update_next_id()
+
+    def _update_next_id(self) -> None:
+        if self._animals:
+            self._next_id = max(self._animals) + 1
+
+    def add_many(self, items: Iterable[Union[Animal, dict]], atomic: bool = True,
+                 trusted: bool = False, defer_indexing: bool = False) -> BulkImportReport:
+        batch: List[Animal] = []
+        positions: List[int] = []
+        issues: List[ImportIssue] = []
+
+        for index, item in enumerate(items):
+            try:
+                animal = item if isinstance(item, Animal) else Animal.from_dict(item, trusted)
+            except Exception as e:
+                animal_id = item.get('animal_id') if isinstance(item, dict) else None
+                issues.append(ImportIssue(index, animal_id, e))
+                continue
+            batch.append(animal)
+            positions.append(index)
+
+        batch_ids = {animal.animal_id for animal in batch}
+        if len(batch_ids) != len(batch) or any(animal_id in self._animals for animal_id in batch_ids):
+            seen: set = set()
+            accepted = []
+            for index, animal in zip(positions, batch):
+                animal_id = animal.animal_id
+                if animal_id in self._animals or animal_id in seen:
+                    issues.append(ImportIssue(index, animal_id, InvalidAnimalDataError(
+                        f"Животное с ID {animal_id} уже существует")))
+                else:
+                    accepted.append(animal)
+                seen.add(animal_id)
+            batch = accepted
+
+        issues.sort(key=lambda issue: issue.index)
+        if issues and atomic:
+            return BulkImportReport(0, issues)
+
+        if defer_indexing and batch:
+            self._indexes_ready = False
+            self._clear_indexes()
+        for animal in batch:
+            self._animals[animal.animal_id] = animal
+            self._index_add(animal)
+        if batch:
+            self._next_id = max(self._next_id, max(animal.animal_id for animal in batch) + 1)
+
+        return BulkImportReport(len(batch), issues)
+
     def add_animal(self, animal: Animal) -> None:
         try:
-            for existing_animal in self.animals:
-                if existing_animal.animal_id == animal.animal_id:
-                    raise InvalidAnimalDataError(f"Животное с ID {animal.animal_id} уже существует")
-
-            self.animals.append(animal)
-            print(f"Животное {animal.name} успешно добавлено!")
+            self._insert(animal)
 
         except Exception as e:
             raise AnimalError(f"Ошибка при добавлении животного: {str(e)}")
 
     def remove_animal(self, animal_id: int) -> bool:
         try:
-            for i, animal in enumerate(self.animals):
-                if animal.animal_id == animal_id:
-                    removed_animal = self.animals.pop(i)
-                    print(f"Животное {removed_animal.name} удалено!")
-                    return True
-
-            raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+            if self._discard(animal_id) is None:
+                raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+            return True
 
         except AnimalNotFoundError:
             raise
@@ -209,19 +755,33 @@ class PetClinic:
 
     def find_animal_by_id(self, animal_id: int) -> Optional[Animal]:
         try:
-            for animal in self.animals:
-                if animal.animal_id == animal_id:
-                    return animal
-            return None
+            return self._animals.get(animal_id)
         except Exception as e:
             raise AnimalError(f"Ошибка при поиске животного: {str(e)}")
 
     def find_animals_by_owner(self, owner: str) -> List[Animal]:
         try:
-            return [animal for animal in self.animals if animal.owner.lower() == owner.lower()]
+            return list(self._posting('owner', owner).values())
         except Exception as e:
             raise AnimalError(f"Ошибка при поиске животных по владельцу: {str(e)}")
 
+    def find_animals(self, exclude: Optional[Dict[str, Any]] = None, **criteria: Any) -> List[Animal]:
+        try:
+            postings = [self._posting(field, value) for field, value in criteria.items() if value is not None]
+            excluded = [self._posting(field, value) for field, value in (exclude or {}).items()]
+
+            if postings:
+                postings.sort(key=len)
+                candidates, required = postings[0], postings[1:]
+            else:
+                candidates, required = self._animals, []
+
+            return [animal for animal_id, animal in candidates.items()
+                    if all(animal_id in posting for posting in required)
+                    and not any(animal_id in posting for posting in excluded)]
+        except Exception as e:
+            raise AnimalError(f"Ошибка при поиске животных: {str(e)}")
+
     def display_all_animals(self) -> None:
         if not self.animals:
             print("В клинике нет животных.")
@@ -235,18 +795,14 @@ class PetClinic:
 
     def save_to_json(self, filename: str) -> None:
         try:
-            data = {
-                'animals': [animal.to_dict() for animal in self.animals],
-                'metadata': {
-                    'saved_at': datetime.now().isoformat(),
-                    'total_animals': len(self.animals)
-                }
+            animals = self.animals
+            metadata = {
+                'saved_at': datetime.now().isoformat(),
+                'total_animals': len(animals)
             }
 
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
-            print(f"Данные успешно сохранены в {filename}")
+                write_json_stream(f, animals, metadata, cache=self.cache_fragments)
 
         except Exception as e:
             raise FileOperationError(f"Ошибка при сохранении в JSON: {str(e)}")
@@ -256,16 +812,28 @@ class PetClinic:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
 
-            self.animals.clear()
+            self._clear()
             for animal_data in data.get('animals', []):
                 animal = Animal.from_dict(animal_data)
-                self.animals.append(animal)
+                self._insert(animal)
 
-            if self.animals:
-                max_id = max(animal.animal_id for animal in self.animals)
-                self._next_id = max_id + 1
+            self._update_next_id()
 
-            print(f"Данные успешно загружены из {filename}")
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при загрузке из JSON: {str(e)}")
+
+    def load_from_json_stream(self, filename: str, progress: Optional[ProgressCallback] = None,
+                              chunk_size: int = JSON_CHUNK_SIZE, trusted: bool = False) -> dict:
+        try:
+            metadata: dict = {}
+            self._clear()
+            for animal in iter_animals_from_json(filename, metadata, progress, chunk_size, trusted):
+                self._insert(animal)
+
+            self._update_next_id()
+            return metadata
 
         except FileNotFoundError:
             raise FileOperationError(f"Файл {filename} не найден")
@@ -274,34 +842,14 @@ class PetClinic:
 
     def save_to_xml(self, filename: str) -> None:
         try:
-            root = ET.Element('pet_clinic')
-            metadata = ET.SubElement(root, 'metadata')
-            ET.SubElement(metadata, 'saved_at').text = datetime.now().isoformat()
-            ET.SubElement(metadata, 'total_animals').text = str(len(self.animals))
-
-            animals_elem = ET.SubElement(root, 'animals')
-            for animal in self.animals:
-                animal_elem = ET.SubElement(animals_elem, 'animal')
-                animal_elem.set('type', animal.__class__.__name__)
-
-                ET.SubElement(animal_elem, 'animal_id').text = str(animal.animal_id)
-                ET.SubElement(animal_elem, 'name').text = animal.name
-                ET.SubElement(animal_elem, 'age').text = str(animal.age)
-                ET.SubElement(animal_elem, 'breed').text = animal.breed
-                ET.SubElement(animal_elem, 'owner').text = animal.owner
-                ET.SubElement(animal_elem, 'health_status').text = animal.health_status
-
-                if isinstance(animal, Dog):
-                    ET.SubElement(animal_elem, 'dog_size').text = animal.dog_size
-                elif isinstance(animal, Cat):
-                    ET.SubElement(animal_elem, 'is_indoor').text = str(animal.is_indoor)
-                elif isinstance(animal, Bird):
-                    ET.SubElement(animal_elem, 'wingspan').text = str(animal.wingspan)
-
-            tree = ET.ElementTree(root)
-            tree.write(filename, encoding='utf-8', xml_declaration=True)
-
-            print(f"Данные успешно сохранены в {filename}")
+            animals = self.animals
+            metadata = {
+                'saved_at': datetime.now().isoformat(),
+                'total_animals': len(animals)
+            }
+
+            with open(filename, 'w', encoding='utf-8', errors='xmlcharrefreplace', newline='\n') as f:
+                write_xml_stream(f, animals, metadata, cache=self.cache_fragments)
 
         except Exception as e:
             raise FileOperationError(f"Ошибка при сохранении в XML: {str(e)}")
@@ -311,35 +859,30 @@ class PetClinic:
             tree = ET.parse(filename)
             root = tree.getroot()
 
-            self.animals.clear()
+            self._clear()
 
             for animal_elem in root.find('animals'):
-                animal_type = animal_elem.get('type')
-                animal_data = {
-                    'type': animal_type,
-                    'animal_id': int(animal_elem.find('animal_id').text),
-                    'name': animal_elem.find('name').text,
-                    'age': int(animal_elem.find('age').text),
-                    'breed': animal_elem.find('breed').text,
-                    'owner': animal_elem.find('owner').text,
-                    'health_status': animal_elem.find('health_status').text
-                }
-
-                if animal_type == 'Dog':
-                    animal_data['dog_size'] = animal_elem.find('dog_size').text
-                elif animal_type == 'Cat':
-                    animal_data['is_indoor'] = animal_elem.find('is_indoor').text.lower() == 'true'
-                elif animal_type == 'Bird':
-                    animal_data['wingspan'] = float(animal_elem.find('wingspan').text)
+                fields = {child.tag: child.text for child in animal_elem}
+                animal = _animal_from_xml_fields(animal_elem.get('type'), fields)
+                self._insert(animal)
 
-                animal = Animal.from_dict(animal_data)
-                self.animals.append(animal)
+            self._update_next_id()
 
-            if self.animals:
-                max_id = max(animal.animal_id for animal in self.animals)
-                self._next_id = max_id + 1
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except Exception as e:
+            raise FileOperationError(f"Ошибка при загрузке из XML: {str(e)}")
+
+    def load_from_xml_stream(self, filename: str, progress: Optional[ProgressCallback] = None,
+                             trusted: bool = False) -> dict:
+        try:
+            metadata: dict = {}
+            self._clear()
+            for animal in iter_animals_from_xml(filename, metadata, progress, trusted):
+                self._insert(animal)
 
-            print(f"Данные успешно загружены из {filename}")
+            self._update_next_id()
+            return metadata
 
         except FileNotFoundError:
             raise FileOperationError(f"Файл {filename} не найден")
@@ -377,7 +920,7 @@ def get_animal_input(clinic: PetClinic) -> Animal:
                 print("Пожалуйста, выберите 1, 2 или 3")
                 continue
 
-            animal_id = 1000 + len(clinic.animals)
+            animal_id = clinic.allocate_id()
             name = input("Имя животного: ").strip()
             age = int(input("Возраст: "))
             breed = input("Порода: ").strip()
@@ -429,13 +972,16 @@ def main():
                 try:
                     animal = get_animal_input(clinic)
                     clinic.add_animal(animal)
+                    print(f"Животное {animal.name} успешно добавлено!")
                 except AnimalError as e:
                     print(f"Ошибка: {e}")
 
             elif choice == '2':
                 try:
                     animal_id = int(input("Введите ID животного для удаления: "))
+                    animal = clinic.find_animal_by_id(animal_id)
                     clinic.remove_animal(animal_id)
+                    print(f"Животное {animal.name} удалено!")
                 except (ValueError, AnimalError) as e:
                     print(f"Ошибка: {e}")
 
@@ -474,6 +1020,7 @@ def main():
                 try:
                     filename = input("Введите имя файла (по умолчанию animals.json): ").strip() or "animals.json"
                     clinic.save_to_json(filename)
+                    print(f"Данные успешно сохранены в {filename}")
                 except FileOperationError as e:
                     print(f"Ошибка: {e}")
 
@@ -481,6 +1028,7 @@ def main():
                 try:
                     filename = input("Введите имя файла (по умолчанию animals.json): ").strip() or "animals.json"
                     clinic.load_from_json(filename)
+                    print(f"Данные успешно загружены из {filename}")
                 except FileOperationError as e:
                     print(f"Ошибка: {e}")
 
@@ -488,6 +1036,7 @@ def main():
                 try:
                     filename = input("Введите имя файла (по умолчанию animals.xml): ").strip() or "animals.xml"
                     clinic.save_to_xml(filename)
+                    print(f"Данные успешно сохранены в {filename}")
                 except FileOperationError as e:
                     print(f"Ошибка: {e}")
 
@@ -495,6 +1044,7 @@ def main():
                 try:
                     filename = input("Введите имя файла (по умолчанию animals.xml): ").strip() or "animals.xml"
                     clinic.load_from_xml(filename)
+                    print(f"Данные успешно загружены из {filename}")
                 except FileOperationError as e:
                     print(f"Ошибка: {e}")
 
@@ -0,0 +1,188 @@
+"""Метрики операций клиники: счётчики, гистограммы задержек и экспорт"""
+
+import json
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+
+LATENCY_BUCKETS = (
+    0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+DEFAULT_METRICS_PORT = 9464
+
+
+class Instrumentation:
+    """Приёмник метрик по умолчанию: ничего не собирает.
+
+    Пока у клиники выключены метрики (enabled = False), её методы не оборачиваются вовсе,
+    так что накладных расходов нет.
+    """
+
+    enabled = False
+
+    def observe(self, operation: str, seconds: float) -> None:
+        pass
+
+    def failure(self, operation: str, error: BaseException) -> None:
+        pass
+
+    def transfer(self, operation: str, direction: str, count: int) -> None:
+        pass
+
+
+NO_METRICS = Instrumentation()
+
+
+def _root_cause(error: BaseException) -> BaseException:
+    seen = {id(error)}
+    while True:
+        inner = error.__cause__ or error.__context__
+        if inner is None or id(inner) in seen:
+            return error
+        seen.add(id(inner))
+        error = inner
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        result, seen = [], 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            result.append((bound, seen))
+        return result
+
+
+class MetricsRegistry(Instrumentation):
+    enabled = True
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, Histogram] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self.bytes: Dict[Tuple[str, str], int] = {}
+
+    def observe(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.latencies.get(operation)
+            if histogram is None:
+                histogram = self.latencies[operation] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def failure(self, operation: str, error: BaseException) -> None:
+        key = (operation, _root_cause(error).__class__.__name__)
+        with self._lock:
+            self.failures[key] = self.failures.get(key, 0) + 1
+
+    def transfer(self, operation: str, direction: str, count: int) -> None:
+        key = (operation, direction)
+        with self._lock:
+            self.bytes[key] = self.bytes.get(key, 0) + count
+
+    def reset(self) -> None:
+        with self._lock:
+            self.latencies.clear()
+            self.failures.clear()
+            self.bytes.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = {
+                operation: {
+                    'count': histogram.count,
+                    'sum_seconds': histogram.sum,
+                    'p50_seconds': histogram.quantile(0.5),
+                    'p99_seconds': histogram.quantile(0.99),
+                    'buckets': {str(bound): count for bound, count in histogram.cumulative()},
+                }
+                for operation, histogram in self.latencies.items()
+            }
+            failures: Dict[str, Dict[str, int]] = {}
+            for (operation, error), count in self.failures.items():
+                failures.setdefault(operation, {})[error] = count
+            transferred: Dict[str, Dict[str, int]] = {}
+            for (operation, direction), count in self.bytes.items():
+                transferred.setdefault(operation, {})[direction] = count
+        return {'operations': operations, 'failures': failures, 'bytes': transferred}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = 'petclinic') -> str:
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {prefix}_operation_seconds Длительность операций клиники")
+            lines.append(f"# TYPE {prefix}_operation_seconds histogram")
+            for operation, histogram in sorted(self.latencies.items()):
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_operation_seconds_bucket{{operation="{operation}",le="{le}"}} {count}')
+                lines.append(f'{prefix}_operation_seconds_sum{{operation="{operation}"}} {histogram.sum!r}')
+                lines.append(f'{prefix}_operation_seconds_count{{operation="{operation}"}} {histogram.count}')
+
+            lines.append(f"# HELP {prefix}_failures_total Неудачные операции по типу исключения")
+            lines.append(f"# TYPE {prefix}_failures_total counter")
+            for (operation, error), count in sorted(self.failures.items()):
+                lines.append(f'{prefix}_failures_total{{operation="{operation}",error="{error}"}} {count}')
+
+            lines.append(f"# HELP {prefix}_bytes_total Байты, прочитанные и записанные при сохранении и загрузке")
+            lines.append(f"# TYPE {prefix}_bytes_total counter")
+            for (operation, direction), count in sorted(self.bytes.items()):
+                lines.append(f'{prefix}_bytes_total{{operation="{operation}",direction="{direction}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def serve_metrics(registry: MetricsRegistry, host: str = '127.0.0.1',
+                  port: int = DEFAULT_METRICS_PORT) -> ThreadingHTTPServer:
+    """Отдаёт /metrics (формат Prometheus) и /metrics.json в фоновом потоке."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path == '/metrics.json':
+                body, content_type = registry.to_json(), 'application/json; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,66 @@
+"""Параллельная загрузка данных филиалов из нескольких файлов"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from main import (Animal, FileOperationError, InvalidAnimalDataError, PetClinic, iter_animals_from_json,
+                  iter_animals_from_xml)
+
+
+CONFLICT_POLICIES = ('error', 'first', 'last')
+
+
+def _is_xml(filename: str) -> bool:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.json', '.xml'):
+        return extension == '.xml'
+    with open(filename, 'rb') as f:
+        return f.read(64).lstrip().startswith(b'<')
+
+
+def _parse_shard(filename: str) -> List[dict]:
+    try:
+        animals = iter_animals_from_xml(filename) if _is_xml(filename) else iter_animals_from_json(filename)
+        return [animal.to_dict() for animal in animals]
+    except FileNotFoundError:
+        raise FileOperationError(f"Файл {filename} не найден")
+    except Exception as e:
+        raise FileOperationError(f"Ошибка при загрузке {filename}: {str(e)}")
+
+
+def load_shards(filenames: Sequence[str], workers: Optional[int] = None,
+                on_conflict: str = 'error') -> Tuple[PetClinic, Dict[int, List[str]]]:
+    if on_conflict not in CONFLICT_POLICIES:
+        raise InvalidAnimalDataError(f"Политика конфликтов должна быть одной из: {list(CONFLICT_POLICIES)}")
+
+    if workers == 1 or len(filenames) <= 1:
+        shards = map(_parse_shard, filenames)
+        return _merge(filenames, shards, on_conflict)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _merge(filenames, executor.map(_parse_shard, filenames), on_conflict)
+
+
+def _merge(filenames: Sequence[str], shards, on_conflict: str) -> Tuple[PetClinic, Dict[int, List[str]]]:
+    merged: Dict[int, Animal] = {}
+    sources: Dict[int, str] = {}
+    conflicts: Dict[int, List[str]] = {}
+
+    for filename, records in zip(filenames, shards):
+        for data in records:
+            animal_id = data['animal_id']
+            if animal_id in merged:
+                conflicts.setdefault(animal_id, [sources[animal_id]]).append(filename)
+                if on_conflict != 'last':
+                    continue
+            merged[animal_id] = Animal.from_dict(data, trusted=True)
+            sources[animal_id] = filename
+
+    if conflicts and on_conflict == 'error':
+        sample = ', '.join(f"{animal_id} ({', '.join(files)})" for animal_id, files in list(conflicts.items())[:5])
+        raise InvalidAnimalDataError(f"Повторяющиеся ID животных в файлах филиалов: {sample}")
+
+    clinic = PetClinic()
+    clinic._replace_all(merged)
+    return clinic, conflicts
@@ -0,0 +1,203 @@
+"""Нечёткий и префиксный поиск по кличкам и владельцам"""
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from main import Animal, InvalidAnimalDataError, PetClinic
+
+
+SEARCH_FIELDS = ('name', 'owner')
+FUZZY_THRESHOLD = 0.45
+
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize('NFC', text).casefold().replace('ё', 'е')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(normalize(text)) if isinstance(text, str) else []
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self._values: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._pending: List[str] = []
+        self._stale = False
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, doc_id: int, value: str) -> None:
+        if doc_id in self._values:
+            self.remove(doc_id)
+        self._values[doc_id] = value
+        for token in set(tokenize(value)):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                self._pending.append(token)
+                for trigram in trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            posting.add(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        value = self._values.pop(doc_id, None)
+        for token in set(tokenize(value)):
+            posting = self._postings[token]
+            posting.discard(doc_id)
+            if posting:
+                continue
+            del self._postings[token]
+            self._stale = True
+            for trigram in trigrams(token):
+                tokens = self._trigrams[trigram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._pending.clear()
+        self._stale = False
+        self._trigrams.clear()
+
+    def _sorted_vocabulary(self) -> List[str]:
+        """Отсортированный словарь: новые токены вливаются одним слиянием при первом запросе после изменений."""
+        if self._pending:
+            self._pending.sort()
+            self._vocabulary = list(heapq.merge(self._vocabulary, self._pending))
+            self._pending = []
+        if self._stale:
+            vocabulary = self._vocabulary
+            self._vocabulary = [token for i, token in enumerate(vocabulary)
+                                if token in self._postings and (not i or vocabulary[i - 1] != token)]
+            self._stale = False
+        return self._vocabulary
+
+    def prefix_tokens(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        vocabulary = self._sorted_vocabulary()
+        start = bisect_left(vocabulary, prefix)
+        tokens = []
+        for token in vocabulary[start:start + limit if limit else None]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def fuzzy_tokens(self, token: str, threshold: float = FUZZY_THRESHOLD) -> List[Tuple[str, float]]:
+        query = trigrams(token)
+        shared: Counter = Counter()
+        for trigram in query:
+            shared.update(self._trigrams.get(trigram, ()))
+
+        matches = []
+        for candidate, common in shared.items():
+            score = 2 * common / (len(query) + len(candidate))
+            if score >= threshold:
+                matches.append((candidate, score))
+        return matches
+
+    def search(self, query: str, threshold: float = FUZZY_THRESHOLD) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        query_tokens = tokenize(query)
+        for position, token in enumerate(query_tokens):
+            matches = dict(self.fuzzy_tokens(token, threshold))
+            if token in self._postings:
+                matches[token] = 1.0
+            if position == len(query_tokens) - 1:
+                for completion in self.prefix_tokens(token, limit=1000):
+                    matches[completion] = max(matches.get(completion, 0.0), 0.9)
+
+            best: Dict[int, float] = {}
+            for candidate, score in sorted(matches.items(), key=lambda match: match[1]):
+                best.update(dict.fromkeys(self._postings[candidate], score))
+            if not scores:
+                scores = best
+                continue
+            if len(best) > len(scores):
+                scores, best = best, scores
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+        return scores
+
+    def complete(self, prefix: str, limit: int = 10, scan: int = 10_000) -> List[str]:
+        tokens = tokenize(prefix)
+        if not tokens:
+            return []
+        *head, last = tokens
+        counts: Counter = Counter()
+        seen = 0
+        for token in self.prefix_tokens(last):
+            for doc_id in self._postings[token]:
+                value = self._values[doc_id]
+                if all(word in tokenize(value) for word in head):
+                    counts[value] += 1
+                seen += 1
+            if seen >= scan:
+                break
+        return [value for value, _ in counts.most_common(limit)]
+
+
+class SearchablePetClinic(PetClinic):
+    def __init__(self):
+        super().__init__()
+        self.search_indexes: Dict[str, SearchIndex] = {field: SearchIndex() for field in SEARCH_FIELDS}
+
+    def _index_add(self, animal: Animal) -> None:
+        super()._index_add(animal)
+        if self._indexes_ready:
+            for field, index in self.search_indexes.items():
+                index.add(animal.animal_id, getattr(animal, field))
+
+    def _index_remove(self, animal_id: int) -> None:
+        super()._index_remove(animal_id)
+        if self._indexes_ready:
+            for index in self.search_indexes.values():
+                index.remove(animal_id)
+
+    def _clear_indexes(self) -> None:
+        super()._clear_indexes()
+        for index in self.search_indexes.values():
+            index.clear()
+
+    def _search_indexes_for(self, fields: Optional[Iterable[str]]) -> List[SearchIndex]:
+        if not self._indexes_ready:
+            self._build_indexes()
+        fields = SEARCH_FIELDS if fields is None else tuple(fields)
+        for field in fields:
+            if field not in self.search_indexes:
+                raise InvalidAnimalDataError(f"Поиск по полю {field} не поддерживается")
+        return [self.search_indexes[field] for field in fields]
+
+    def search(self, query: str, limit: int = 10, fields: Optional[Iterable[str]] = None,
+               threshold: float = FUZZY_THRESHOLD) -> List[Tuple[Animal, float]]:
+        scores: Dict[int, float] = {}
+        for index in self._search_indexes_for(fields):
+            field_scores = index.search(query, threshold)
+            if len(field_scores) > len(scores):
+                scores, field_scores = field_scores, scores
+            for doc_id, score in field_scores.items():
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self._animals[doc_id], score) for doc_id, score in ranked]
+
+    def autocomplete(self, prefix: str, field: str = 'owner', limit: int = 10) -> List[str]:
+        index, = self._search_indexes_for([field])
+        return index.complete(prefix, limit)
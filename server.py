@@ -0,0 +1,240 @@
+"""Асинхронный сервис клиники: построчный JSON-протокол и генератор нагрузки"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from concurrent_clinic import ConcurrentPetClinic
+from main import AnimalError, FileOperationError, InvalidAnimalDataError
+from snapshot import load_snapshot_into, save_snapshot
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+def _file_format(filename: str, requested: Optional[str]) -> str:
+    file_format = (requested or os.path.splitext(filename)[1].lstrip('.')).lower()
+    if file_format not in ('json', 'xml', 'snap'):
+        raise FileOperationError(f"Неизвестный формат файла: {filename}")
+    return file_format
+
+
+def _load_clinic(filename: str, file_format: str) -> ConcurrentPetClinic:
+    clinic = ConcurrentPetClinic()
+    if file_format == 'json':
+        clinic.load_from_json_stream(filename)
+    elif file_format == 'xml':
+        clinic.load_from_xml_stream(filename)
+    else:
+        load_snapshot_into(clinic, filename)
+    # снимок загружается с отложенными индексами; строим их здесь, в исполнителе, а не на первом запросе
+    if not clinic._indexes_ready:
+        clinic._build_indexes()
+    return clinic
+
+
+class ClinicServer:
+    def __init__(self, clinic: Optional[ConcurrentPetClinic] = None):
+        self.clinic = clinic if clinic is not None else ConcurrentPetClinic()
+        self._handlers: Dict[str, Callable[[dict], Awaitable[Any]]] = {
+            'add': self._add,
+            'remove': self._remove,
+            'find_by_id': self._find_by_id,
+            'find_by_owner': self._find_by_owner,
+            'save': self._save,
+            'load': self._load,
+        }
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._serve_client, host, port)
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.dispatch(line)
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            handler = self._handlers.get(request.get('op'))
+            if handler is None:
+                raise InvalidAnimalDataError(f"Неизвестная операция: {request.get('op')}")
+            return {'ok': True, 'result': await handler(request)}
+        except (AnimalError, ValueError, KeyError, TypeError, AttributeError) as e:
+            return {'ok': False, 'error': str(e), 'type': e.__class__.__name__}
+
+    async def _add(self, request: dict) -> int:
+        report = self.clinic.add_many([request['animal']])
+        if not report.ok:
+            raise report.issues[0].error
+        return request['animal']['animal_id']
+
+    async def _remove(self, request: dict) -> bool:
+        return self.clinic.remove_animal(int(request['animal_id']))
+
+    async def _find_by_id(self, request: dict) -> Optional[dict]:
+        animal = self.clinic.find_animal_by_id(int(request['animal_id']))
+        return animal.to_dict() if animal is not None else None
+
+    async def _find_by_owner(self, request: dict) -> List[dict]:
+        return [animal.to_dict() for animal in self.clinic.find_animals_by_owner(request['owner'])]
+
+    async def _save(self, request: dict) -> int:
+        filename = request['filename']
+        file_format = _file_format(filename, request.get('format'))
+        clinic = self.clinic
+        saver = {
+            'json': clinic.save_to_json,
+            'xml': clinic.save_to_xml,
+            'snap': lambda name: save_snapshot(clinic, name),
+        }[file_format]
+        await asyncio.get_running_loop().run_in_executor(None, saver, filename)
+        return len(clinic)
+
+    async def _load(self, request: dict) -> int:
+        filename = request['filename']
+        file_format = _file_format(filename, request.get('format'))
+        loop = asyncio.get_running_loop()
+        clinic = await loop.run_in_executor(None, _load_clinic, filename, file_format)
+        clinic.metrics = self.clinic.metrics
+        self.clinic = clinic
+        return len(clinic)
+
+
+class ClinicClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> 'ClinicClient':
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op: str, **fields: Any) -> dict:
+        self._writer.write(json.dumps({'op': op, **fields}, ensure_ascii=False).encode('utf-8') + b'\n')
+        await self._writer.drain()
+        return json.loads(await self._reader.readline())
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def run_load(host: str, port: int, clients: int = 16, requests_per_client: int = 500,
+                   save_every: float = 0.5) -> dict:
+    latencies: Dict[str, List[float]] = {}
+    done = asyncio.Event()
+
+    async def client_loop(number: int) -> None:
+        client = await ClinicClient.connect(host, port)
+        base_id = 1_000_000 * (number + 1)
+        for i in range(requests_per_client):
+            step = i % 4
+            start = time.perf_counter()
+            if step == 0:
+                op = 'add'
+                await client.request(op, animal={
+                    'type': 'Cat', 'animal_id': base_id + i, 'name': f"Кошка {i}", 'age': 1 + i % 12,
+                    'breed': "Сиамская", 'owner': f"Владелец {number}", 'is_indoor': bool(i % 2)})
+            elif step == 1:
+                op = 'find_by_id'
+                await client.request(op, animal_id=base_id + i - 1)
+            elif step == 2:
+                op = 'find_by_owner'
+                await client.request(op, owner=f"Владелец {number}")
+            else:
+                op = 'remove'
+                await client.request(op, animal_id=base_id + i - 3)
+            latencies.setdefault(op, []).append(time.perf_counter() - start)
+        await client.close()
+
+    async def saver(filename: str) -> int:
+        client = await ClinicClient.connect(host, port)
+        saves = 0
+        while not done.is_set():
+            await client.request('save', filename=filename)
+            saves += 1
+            try:
+                await asyncio.wait_for(done.wait(), save_every)
+            except asyncio.TimeoutError:
+                pass
+        await client.close()
+        return saves
+
+    with tempfile.TemporaryDirectory() as tmp:
+        save_task = asyncio.ensure_future(saver(os.path.join(tmp, 'animals.json')))
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(number) for number in range(clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        saves = await save_task
+
+    everything = [sample for samples in latencies.values() for sample in samples]
+    report = {
+        'requests': len(everything),
+        'saves': saves,
+        'throughput': len(everything) / elapsed,
+        'p50_ms': _percentile(everything, 50) * 1000,
+        'p99_ms': _percentile(everything, 99) * 1000,
+    }
+    for op, samples in latencies.items():
+        report[f'{op}_p50_ms'] = _percentile(samples, 50) * 1000
+        report[f'{op}_p99_ms'] = _percentile(samples, 99) * 1000
+    return report
+
+
+async def _bench(args: argparse.Namespace) -> None:
+    clinic = ConcurrentPetClinic()
+    clinic.add_many([{'type': 'Dog', 'animal_id': i, 'name': f"Пёс {i}", 'age': 1 + i % 15, 'breed': "Лабрадор",
+                      'owner': f"Хозяин {i % 1000}", 'dog_size': "Большой"} for i in range(1, args.animals + 1)],
+                    trusted=True)
+    server = await ClinicServer(clinic).start(args.host, args.port)
+    async with server:
+        report = await run_load(args.host, args.port, args.clients, args.requests)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = await ClinicServer().start(args.host, args.port)
+    print(f"Сервис клиники слушает {args.host}:{args.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Асинхронный сервис ветеринарной клиники")
+    parser.add_argument('command', choices=['serve', 'bench'])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--animals', type=int, default=100_000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args) if args.command == 'serve' else _bench(args))
+    except KeyboardInterrupt:
+        print("\nСервис остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Шардированная клиника: животные филиалов в отдельных PetClinic и отдельных файлах"""
+
+import itertools
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, TypeVar, Union
+
+from main import (Animal, AnimalError, AnimalNotFoundError, BulkImportReport, FileOperationError, ImportIssue,
+                  InvalidAnimalDataError, PetClinic, _casefold)
+
+
+PARTITIONS = ('range', 'owner')
+DEFAULT_SHARDS = 4
+DEFAULT_BLOCK_SIZE = 1_000
+MANIFEST_NAME = 'shards.json'
+FORMATS = ('json', 'xml')
+
+T = TypeVar('T')
+_by_id = attrgetter('animal_id')
+
+
+class BlockIdAllocator:
+    """Выдаёт ID шарда без согласования с остальными.
+
+    Ось ID нарезана на блоки по block_size; шарду k принадлежат блоки с номером b % shards == k,
+    поэтому диапазоны шардов не пересекаются, а по ID сразу видно, какой аллокатор его выдал.
+    """
+
+    def __init__(self, shard: int, shards: int, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.shard = shard
+        self.shards = shards
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = self._align(1)
+
+    @property
+    def next_id(self) -> int:
+        return self._next
+
+    def owns(self, animal_id: int) -> bool:
+        return (animal_id - 1) // self.block_size % self.shards == self.shard
+
+    def _align(self, value: int) -> int:
+        block = (value - 1) // self.block_size
+        shift = (self.shard - block) % self.shards
+        return value if not shift else (block + shift) * self.block_size + 1
+
+    def allocate(self) -> int:
+        with self._lock:
+            animal_id = self._next
+            self._next = self._align(animal_id + 1)
+            return animal_id
+
+    def observe(self, animal_id: int) -> None:
+        """Сдвигает счётчик за уже занятый ID, чтобы не выдать его повторно."""
+        with self._lock:
+            if animal_id >= self._next:
+                self._next = self._align(animal_id + 1)
+
+
+def owner_shard(owner: Any, shards: int) -> int:
+    """Стабильный между запусками номер шарда владельца (hash() строк зависит от PYTHONHASHSEED)."""
+    key = _casefold(owner) or ''
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+class ShardedPetClinic:
+    """Фасад над несколькими PetClinic.
+
+    partition='range' раскладывает животных по блокам ID их аллокатора, 'owner' — по хешу
+    владельца, так что все питомцы одного владельца лежат в одном шарде и поиск по владельцу
+    обращается к единственному шарду. Остальные запросы рассылаются всем шардам и сливаются по ID;
+    при workers > 1 рассылка идёт из пула потоков — это окупается, когда шарды упираются во
+    ввод-вывод (загрузка, сохранение), а не для поиска в памяти под GIL.
+    """
+
+    def __init__(self, shards: int = DEFAULT_SHARDS, partition: str = 'range',
+                 block_size: int = DEFAULT_BLOCK_SIZE, workers: int = 1,
+                 shard_factory: Callable[[], PetClinic] = PetClinic):
+        if partition not in PARTITIONS:
+            raise InvalidAnimalDataError(f"Разбиение должно быть одним из: {list(PARTITIONS)}")
+        if not isinstance(shards, int) or shards <= 0:
+            raise InvalidAnimalDataError("Количество шардов должно быть положительным целым числом")
+        if not isinstance(block_size, int) or block_size <= 0:
+            raise InvalidAnimalDataError("Размер блока ID должен быть положительным целым числом")
+
+        self.partition = partition
+        self.block_size = block_size
+        self.shards: List[PetClinic] = [shard_factory() for _ in range(shards)]
+        self.allocators = [BlockIdAllocator(shard, shards, block_size) for shard in range(shards)]
+        self._loaded: Set[int] = set(range(shards))
+        self._round_robin = itertools.count()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='shard') if workers > 1 else None
+
+    def __enter__(self) -> 'ShardedPetClinic':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _fan_out(self, call: Callable[[int], T], indexes: Optional[Sequence[int]] = None) -> List[T]:
+        indexes = range(len(self.shards)) if indexes is None else indexes
+        if self._executor is None or len(indexes) < 2:
+            return [call(index) for index in indexes]
+        return list(self._executor.map(call, indexes))
+
+    @property
+    def animals(self) -> Iterator[Animal]:
+        return itertools.chain.from_iterable(shard.animals for shard in self.shards)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __contains__(self, animal_id: int) -> bool:
+        return self._locate(animal_id) is not None
+
+    def _id_space(self, animal_id: int) -> int:
+        return (animal_id - 1) // self.block_size % len(self.shards)
+
+    def shard_index(self, animal: Animal) -> int:
+        if self.partition == 'owner':
+            return owner_shard(animal.owner, len(self.shards))
+        return self._id_space(animal.animal_id)
+
+    def _locate(self, animal_id: int) -> Optional[int]:
+        if not isinstance(animal_id, int) or animal_id <= 0:
+            return None
+        home = self._id_space(animal_id)
+        if animal_id in self.shards[home]:
+            return home
+        if self.partition == 'owner':
+            for index, shard in enumerate(self.shards):
+                if animal_id in shard:
+                    return index
+        return None
+
+    def _require_loaded(self, index: int) -> None:
+        if index not in self._loaded:
+            raise AnimalError(f"Шард {index} не загружен")
+
+    def _require_known_id(self, animal_id: int) -> None:
+        """При разбиении по владельцу животное с этим ID может лежать в незагруженном шарде, и проверка
+        на повтор его не увидит; поэтому принимаются только ID из блоков загруженных аллокаторов."""
+        if self.partition == 'owner' and self._id_space(animal_id) not in self._loaded:
+            raise AnimalError(f"ID {animal_id} выдан незагруженным шардом {self._id_space(animal_id)}")
+
+    def allocate_id(self, owner: Optional[str] = None) -> int:
+        """Новый ID; при разбиении по владельцу его стоит передать, чтобы ID выдал шард владельца."""
+        if self.partition == 'owner' and owner is not None:
+            index = owner_shard(owner, len(self.shards))
+            self._require_loaded(index)
+        else:
+            loaded = sorted(self._loaded)
+            if not loaded:
+                raise AnimalError("Нет загруженных шардов")
+            index = loaded[next(self._round_robin) % len(loaded)]
+        return self.allocators[index].allocate()
+
+    def _observe(self, animal_id: int) -> None:
+        self.allocators[self._id_space(animal_id)].observe(animal_id)
+
+    def add_animal(self, animal: Animal) -> None:
+        index = self.shard_index(animal)
+        self._require_loaded(index)
+        self._require_known_id(animal.animal_id)
+        if self._locate(animal.animal_id) is not None:
+            raise AnimalError(f"Ошибка при добавлении животного: Животное с ID {animal.animal_id} уже существует")
+        self.shards[index].add_animal(animal)
+        self._observe(animal.animal_id)
+
+    def add_many(self, items: Iterable[Union[Animal, dict]], atomic: bool = True,
+                 trusted: bool = False, defer_indexing: bool = False) -> BulkImportReport:
+        """Проверяет и раскладывает пакет по шардам, затем шарды принимают свои части параллельно."""
+        batches: List[List[Animal]] = [[] for _ in self.shards]
+        issues: List[ImportIssue] = []
+        seen: Set[int] = set()
+
+        for index, item in enumerate(items):
+            try:
+                animal = item if isinstance(item, Animal) else Animal.from_dict(item, trusted)
+                shard = self.shard_index(animal)
+                self._require_loaded(shard)
+                self._require_known_id(animal.animal_id)
+                if animal.animal_id in seen or self._locate(animal.animal_id) is not None:
+                    raise InvalidAnimalDataError(f"Животное с ID {animal.animal_id} уже существует")
+            except Exception as e:
+                animal_id = item.get('animal_id') if isinstance(item, dict) else getattr(item, 'animal_id', None)
+                issues.append(ImportIssue(index, animal_id, e))
+                continue
+            seen.add(animal.animal_id)
+            batches[shard].append(animal)
+
+        if issues and atomic:
+            return BulkImportReport(0, issues)
+
+        indexes = [index for index, batch in enumerate(batches) if batch]
+        reports = self._fan_out(lambda index: self.shards[index].add_many(batches[index],
+                                                                          defer_indexing=defer_indexing), indexes)
+        for animal_id in seen:
+            self._observe(animal_id)
+        return BulkImportReport(sum(report.added for report in reports), issues)
+
+    def remove_animal(self, animal_id: int) -> bool:
+        index = self._locate(animal_id)
+        if index is None:
+            raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+        return self.shards[index].remove_animal(animal_id)
+
+    def reindex_animal(self, animal_id: int) -> None:
+        """После смены владельца при разбиении по владельцу животное переезжает в его шард."""
+        index = self._locate(animal_id)
+        if index is None:
+            raise AnimalNotFoundError(f"Животное с ID {animal_id} не найдено")
+        animal = self.shards[index].find_animal_by_id(animal_id)
+        target = self.shard_index(animal)
+        if target == index:
+            self.shards[index].reindex_animal(animal_id)
+            return
+        self._require_loaded(target)
+        self.shards[index].remove_animal(animal_id)
+        self.shards[target].add_animal(animal)
+
+    def find_animal_by_id(self, animal_id: int) -> Optional[Animal]:
+        index = self._locate(animal_id)
+        return None if index is None else self.shards[index].find_animal_by_id(animal_id)
+
+    def find_animals_by_owner(self, owner: str) -> List[Animal]:
+        if self.partition == 'owner':
+            return self.shards[owner_shard(owner, len(self.shards))].find_animals_by_owner(owner)
+        return self._merge(self._fan_out(lambda index: self.shards[index].find_animals_by_owner(owner)))
+
+    def find_animals(self, exclude: Optional[Dict[str, Any]] = None, **criteria: Any) -> List[Animal]:
+        indexes = None
+        if self.partition == 'owner' and criteria.get('owner') is not None:
+            indexes = [owner_shard(criteria['owner'], len(self.shards))]
+        return self._merge(self._fan_out(lambda index: self.shards[index].find_animals(exclude, **criteria),
+                                         indexes))
+
+    @staticmethod
+    def _merge(results: List[List[Animal]]) -> List[Animal]:
+        merged = [animal for result in results for animal in result]
+        merged.sort(key=_by_id)
+        return merged
+
+    def display_all_animals(self) -> None:
+        if not len(self):
+            print("В клинике нет животных.")
+            return
+
+        print(f"\nВсего животных в клинике: {len(self)} (шардов: {len(self.shards)})")
+        print("-" * 50)
+        for index, shard in enumerate(self.shards):
+            for animal in shard.animals:
+                print(f"[шард {index}] {animal.display_info()}")
+                print(f"Звук: {animal.make_sound()}")
+                print("-" * 50)
+
+    @staticmethod
+    def shard_filename(index: int, file_format: str = 'json') -> str:
+        return f"shard_{index}.{file_format}"
+
+    def save(self, directory: str, file_format: str = 'json') -> None:
+        """Сохраняет загруженные шарды в отдельные файлы и манифест с отметками аллокаторов."""
+        if file_format not in FORMATS:
+            raise InvalidAnimalDataError(f"Формат должен быть одним из: {list(FORMATS)}")
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            previous = _read_manifest(manifest_path) if os.path.exists(manifest_path) else {}
+        except (OSError, AnimalError) as e:
+            raise FileOperationError(f"Ошибка при сохранении шардов: {str(e)}")
+
+        layout = (self.partition, len(self.shards), self.block_size)
+        if previous and (previous['partition'], previous['shards'], previous['block_size']) != layout:
+            raise FileOperationError(f"Каталог {directory} содержит шарды с другим разбиением")
+
+        indexes = sorted(self._loaded)
+        self._fan_out(lambda index: getattr(self.shards[index], f'save_to_{file_format}')(
+            os.path.join(directory, self.shard_filename(index, file_format))), indexes)
+
+        files = list(previous.get('files') or [None] * len(self.shards))
+        for index in indexes:
+            files[index] = self.shard_filename(index, file_format)
+        next_ids = previous.get('next_ids') or [1] * len(self.shards)
+        manifest = {
+            'partition': self.partition,
+            'shards': len(self.shards),
+            'block_size': self.block_size,
+            'files': files,
+            'next_ids': [max(mark, allocator.next_id) for mark, allocator in zip(next_ids, self.allocators)],
+            'saved_at': datetime.now().isoformat(),
+        }
+        try:
+            temporary = manifest_path + '.tmp'
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(temporary, manifest_path)
+        except OSError as e:
+            raise FileOperationError(f"Ошибка при сохранении манифеста шардов: {str(e)}")
+
+    @classmethod
+    def load(cls, directory: str, only: Optional[Iterable[int]] = None, workers: int = 1,
+             shard_factory: Callable[[], PetClinic] = PetClinic) -> 'ShardedPetClinic':
+        """Загружает шарды из каталога; only задаёт шарды филиала, остальные не читаются."""
+        manifest = _read_manifest(os.path.join(directory, MANIFEST_NAME))
+        clinic = cls(manifest['shards'], manifest['partition'], manifest['block_size'], workers, shard_factory)
+        indexes = sorted(set(range(len(clinic.shards)) if only is None else only))
+        for index in indexes:
+            if not 0 <= index < len(clinic.shards):
+                clinic.close()
+                raise InvalidAnimalDataError(f"Шарда {index} нет в манифесте")
+
+        for allocator, mark in zip(clinic.allocators, manifest['next_ids']):
+            allocator.observe(mark - 1)
+
+        def load_shard(index: int) -> None:
+            filename = manifest['files'][index]
+            if filename is None:
+                return
+            path = os.path.join(directory, filename)
+            if filename.lower().endswith('.xml'):
+                clinic.shards[index].load_from_xml_stream(path)
+            else:
+                clinic.shards[index].load_from_json_stream(path)
+
+        try:
+            clinic._fan_out(load_shard, indexes)
+        except Exception:
+            clinic.close()
+            raise
+        clinic._loaded = set(indexes)
+        seen: Set[int] = set()
+        for index in indexes:
+            for animal in clinic.shards[index].animals:
+                if animal.animal_id in seen:
+                    clinic.close()
+                    raise FileOperationError(f"Животное с ID {animal.animal_id} есть в нескольких шардах")
+                seen.add(animal.animal_id)
+                clinic._observe(animal.animal_id)
+        return clinic
+
+
+def _read_manifest(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['partition'] not in PARTITIONS or len(manifest['files']) != manifest['shards']:
+            raise ValueError("несогласованный манифест")
+        if len(manifest['next_ids']) != manifest['shards']:
+            raise ValueError("несогласованный манифест")
+        return manifest
+    except FileNotFoundError:
+        raise FileOperationError(f"Файл {path} не найден")
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise FileOperationError(f"Ошибка при чтении манифеста шардов: {str(e)}")
@@ -0,0 +1,294 @@
+"""Бинарные снимки клиники: быстрое сохранение и восстановление"""
+
+import gc
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from main import Animal, Bird, Cat, Dog, FileOperationError, PetClinic
+
+
+MAGIC = b'PCSN'
+VERSION = 1
+NO_STRING = 0xFFFFFFFF
+
+TYPES = ('Dog', 'Cat', 'Bird')
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+CLASSES = (Dog, Cat, Bird)
+
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ('animal_id', 'q'),
+    ('age', 'q'),
+    ('wingspan', 'd'),
+    ('type', 'B'),
+    ('is_indoor', 'B'),
+    ('name', 'I'),
+    ('breed', 'I'),
+    ('owner', 'I'),
+    ('health_status', 'I'),
+    ('dog_size', 'I'),
+)
+
+# magic, версия, резерв, число записей, число строк, смещения колонок, таблицы строк и данных строк
+HEADER = struct.Struct(f'<4sHHQQ{len(COLUMNS) + 2}Q')
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _StringTable:
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.encoded: List[bytes] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.encoded)
+            self.encoded.append(value.encode('utf-8'))
+        return code
+
+
+def save_snapshot(clinic: PetClinic, filename: str) -> None:
+    try:
+        strings = _StringTable()
+        columns = {name: array(typecode) for name, typecode in COLUMNS}
+        for animal in clinic.animals:
+            columns['animal_id'].append(animal.animal_id)
+            columns['age'].append(animal.age)
+            columns['wingspan'].append(getattr(animal, 'wingspan', 0.0))
+            type_code = TYPE_CODES.get(animal.__class__.__name__)
+            if type_code is None:
+                raise FileOperationError(f"вид {animal.__class__.__name__} не поддерживается снимком "
+                                         f"(поддерживаются: {', '.join(TYPES)})")
+            columns['type'].append(type_code)
+            columns['is_indoor'].append(1 if getattr(animal, 'is_indoor', False) else 0)
+            columns['name'].append(strings.code(animal.name))
+            columns['breed'].append(strings.code(animal.breed))
+            columns['owner'].append(strings.code(animal.owner))
+            columns['health_status'].append(strings.code(animal.health_status))
+            columns['dog_size'].append(strings.code(getattr(animal, 'dog_size', None)))
+
+        string_offsets = array('Q', [0])
+        for encoded in strings.encoded:
+            string_offsets.append(string_offsets[-1] + len(encoded))
+
+        blobs = [columns[name].tobytes() for name, _ in COLUMNS] + [string_offsets.tobytes()]
+        offsets = []
+        position = HEADER.size
+        for blob in blobs:
+            position = _align(position)
+            offsets.append(position)
+            position += len(blob)
+        offsets.append(position)
+
+        with open(filename, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(columns['animal_id']), len(strings.encoded), *offsets))
+            for offset, blob in zip(offsets, blobs):
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(blob)
+            f.writelines(strings.encoded)
+
+    except Exception as e:
+        raise FileOperationError(f"Ошибка при сохранении снимка: {str(e)}")
+
+
+class Snapshot:
+    def __init__(self, filename: str):
+        try:
+            with open(filename, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise FileOperationError(f"Файл {filename} не найден")
+        except (OSError, ValueError) as e:
+            raise FileOperationError(f"Ошибка при открытии снимка: {str(e)}")
+
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise FileOperationError(f"Файл {filename} не является снимком клиники")
+        magic, version, _, count, string_count, *offsets = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise FileOperationError(f"Файл {filename} не является снимком клиники")
+        if version != VERSION:
+            self.close()
+            raise FileOperationError(f"Неподдерживаемая версия снимка: {version}")
+
+        # Смещения и длины берутся из заголовка: обрезанный или испорченный файл не должен читаться за концом
+        size = len(self._mmap)
+        string_offsets_at, strings_at = offsets[len(COLUMNS)], offsets[len(COLUMNS) + 1]
+        spans = [(offset, count * struct.calcsize(typecode)) for (_, typecode), offset in zip(COLUMNS, offsets)]
+        spans.append((string_offsets_at, (string_count + 1) * 8))
+        if strings_at > size or any(offset + length > size for offset, length in spans):
+            self.close()
+            raise FileOperationError(f"Снимок {filename} повреждён или обрезан")
+
+        view = memoryview(self._mmap)
+        self._views = [view]
+        self.count = count
+        self.columns: Dict[str, memoryview] = {}
+        for (name, typecode), offset in zip(COLUMNS, offsets):
+            column = view[offset:offset + count * struct.calcsize(typecode)].cast(typecode)
+            self._views.append(column)
+            self.columns[name] = column
+        self._string_offsets = view[string_offsets_at:string_offsets_at + (string_count + 1) * 8].cast('Q')
+        self._views.append(self._string_offsets)
+        self._strings_at = strings_at
+        if strings_at + self._string_offsets[string_count] > size:
+            self.close()
+            raise FileOperationError(f"Снимок {filename} повреждён или обрезан")
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        for view in reversed(getattr(self, '_views', [])):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    @property
+    def ids(self) -> memoryview:
+        return self.columns['animal_id']
+
+    @property
+    def ages(self) -> memoryview:
+        return self.columns['age']
+
+    def string(self, code: int) -> Optional[str]:
+        if code == NO_STRING:
+            return None
+        start = self._strings_at + self._string_offsets[code]
+        end = self._strings_at + self._string_offsets[code + 1]
+        return self._mmap[start:end].decode('utf-8')
+
+    def strings(self) -> List[str]:
+        offsets, start = self._string_offsets, self._strings_at
+        data = self._mmap[start:start + offsets[len(offsets) - 1]]
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def record(self, row: int) -> dict:
+        columns = self.columns
+        species = TYPES[columns['type'][row]]
+        data: Dict[str, Any] = {
+            'type': species,
+            'animal_id': columns['animal_id'][row],
+            'name': self.string(columns['name'][row]),
+            'age': columns['age'][row],
+            'breed': self.string(columns['breed'][row]),
+            'owner': self.string(columns['owner'][row]),
+            'health_status': self.string(columns['health_status'][row]),
+        }
+        if species == 'Dog':
+            data['dog_size'] = self.string(columns['dog_size'][row])
+        elif species == 'Cat':
+            data['is_indoor'] = bool(columns['is_indoor'][row])
+        else:
+            data['wingspan'] = columns['wingspan'][row]
+        return data
+
+    def animal(self, row: int) -> Animal:
+        return Animal.from_dict(self.record(row), trusted=True)
+
+    def iter_animals(self) -> Iterator[Animal]:
+        strings = self.strings()
+        strings.append(None)
+        columns = [self.columns[name].tolist() for name, _ in COLUMNS]
+        new = object.__new__
+        set_animal_id, set_name, set_age = Animal.animal_id.__set__, Animal.name.__set__, Animal.age.__set__
+        set_breed, set_owner, set_status = Animal.breed.__set__, Animal.owner.__set__, Animal.health_status.__set__
+        set_dog_size, set_is_indoor, set_wingspan = Dog.dog_size.__set__, Cat.is_indoor.__set__, Bird.wingspan.__set__
+        for animal_id, age, wingspan, type_code, is_indoor, name, breed, owner, status, dog_size in zip(*columns):
+            animal = new(CLASSES[type_code])
+            set_animal_id(animal, animal_id)
+            set_name(animal, strings[name])
+            set_age(animal, age)
+            set_breed(animal, strings[breed])
+            set_owner(animal, strings[owner])
+            set_status(animal, strings[status if status != NO_STRING else -1])
+            if type_code == 0:
+                set_dog_size(animal, strings[dog_size if dog_size != NO_STRING else -1])
+            elif type_code == 1:
+                set_is_indoor(animal, bool(is_indoor))
+            else:
+                set_wingspan(animal, wingspan)
+            yield animal
+
+
+def load_snapshot_into(clinic: PetClinic, filename: str) -> None:
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with Snapshot(filename) as snapshot:
+            animals = dict(zip(snapshot.ids.tolist(), snapshot.iter_animals()))
+            if len(animals) != len(snapshot):
+                raise FileOperationError("Снимок содержит повторяющиеся ID животных")
+        clinic._replace_all(animals)
+    except FileOperationError:
+        raise
+    except Exception as e:
+        raise FileOperationError(f"Ошибка при загрузке снимка: {str(e)}")
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def load_snapshot(filename: str) -> PetClinic:
+    clinic = PetClinic()
+    load_snapshot_into(clinic, filename)
+    return clinic
+
+
+def _load_json(filename: str) -> PetClinic:
+    clinic = PetClinic()
+    clinic.load_from_json_stream(filename)
+    return clinic
+
+
+def _load_xml(filename: str) -> PetClinic:
+    clinic = PetClinic()
+    clinic.load_from_xml_stream(filename)
+    return clinic
+
+
+FORMATS: Dict[str, Tuple[Callable[[str], PetClinic], Callable[[PetClinic, str], None]]] = {
+    '.json': (_load_json, PetClinic.save_to_json),
+    '.xml': (_load_xml, PetClinic.save_to_xml),
+    '.snap': (load_snapshot, save_snapshot),
+}
+
+
+def _format_of(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in FORMATS:
+        raise FileOperationError(f"Неизвестный формат файла: {filename}")
+    return extension
+
+
+def convert(source: str, target: str) -> int:
+    clinic = FORMATS[_format_of(source)][0](source)
+    FORMATS[_format_of(target)][1](clinic, target)
+    return len(clinic)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Использование: python snapshot.py <исходный файл> <файл назначения>")
+        sys.exit(1)
+    try:
+        print(f"Преобразовано животных: {convert(sys.argv[1], sys.argv[2])}")
+    except FileOperationError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
@@ -0,0 +1,43 @@
+import contextlib
+import io
+import unittest
+
+from benchmark import compare
+
+
+def sharded_rows(scale: float = 1.0) -> list:
+    rows = [{'partition': 'single', 'shards': 1, 'workers': 1, 'add_many_s': 1.0, 'save_s': None}]
+    for partition in ('range', 'owner'):
+        for workers, add_many_s in ((1, 2.0), (4, 0.5)):
+            rows.append({'partition': partition, 'shards': 4, 'workers': workers,
+                         'add_many_s': add_many_s * scale, 'save_s': 0.3})
+    return rows
+
+
+class CompareTest(unittest.TestCase):
+    def compare(self, current: dict, baseline: dict):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            regressions = compare({'benchmarks': current}, {'benchmarks': baseline})
+        return regressions, output.getvalue()
+
+    def test_same_run_has_no_changes(self):
+        current = {'sharded': sharded_rows(), 'core': [{'size': 1000, 'find_us': 2.0, 'load_per_s': 5e5}]}
+        regressions, output = self.compare(current, current)
+        self.assertEqual(regressions, [])
+        self.assertNotIn('workers:', output)
+        self.assertEqual(output.count('(+0.0%)'), output.count('\n'))
+        self.assertIn('sharded[partition=owner, shards=4, workers=4].add_many_s', output)
+
+    def test_regressions_are_matched_by_all_parameters(self):
+        regressions, _ = self.compare({'sharded': sharded_rows(1.5)}, {'sharded': sharded_rows()})
+        self.assertEqual(len(regressions), 4)
+        self.assertIn('sharded[partition=range, shards=4, workers=1].add_many_s: 2 -> 3', regressions)
+
+        regressions, _ = self.compare({'core': [{'size': 1000, 'load_per_s': 4e5}]},
+                                      {'core': [{'size': 1000, 'load_per_s': 5e5}]})
+        self.assertEqual(regressions, ['core[size=1000].load_per_s: 5e+05 -> 4e+05'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from datagen import generate_animals, generate_records
+from main import Dog, InvalidAnimalDataError, PetClinic
+
+
+class _NoScan(dict):
+    """Реестр, который падает при любом полном обходе."""
+
+    def keys(self):
+        raise AssertionError("add_many обошёл весь реестр")
+
+    def __iter__(self):
+        raise AssertionError("add_many обошёл весь реестр")
+
+
+class AddManyTest(unittest.TestCase):
+    def test_reports_duplicates_and_invalid_records(self):
+        clinic = PetClinic()
+        clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов"))
+        records = list(generate_records(3, start_id=2))
+        records.append(dict(records[0]))
+        records.append({'type': 'Dog', 'animal_id': 1, 'name': "Рекс", 'age': 2, 'breed': "Такса", 'owner': "Я"})
+        records.append({'type': 'Dog', 'animal_id': 9, 'name': "", 'age': 2, 'breed': "Такса", 'owner': "Я"})
+
+        report = clinic.add_many(records)
+        self.assertEqual(report.added, 0)
+        self.assertEqual([issue.index for issue in report.issues], [3, 4, 5])
+        self.assertEqual(len(clinic), 1)
+
+        report = clinic.add_many(records, atomic=False)
+        self.assertEqual(report.added, 3)
+        self.assertEqual(report.errors_by_type(), {'InvalidAnimalDataError': 3})
+        self.assertEqual(sorted(animal.animal_id for animal in clinic.animals), [1, 2, 3, 4])
+
+    def test_duplicate_probe_does_not_scan_registry(self):
+        clinic = PetClinic()
+        clinic.add_many(generate_animals(1000))
+        clinic._animals = _NoScan(clinic._animals)
+
+        report = clinic.add_many(generate_animals(10, start_id=1001))
+        self.assertTrue(report.ok)
+        report = clinic.add_many(generate_animals(1, start_id=5))
+        self.assertIsInstance(report.issues[0].error, InvalidAnimalDataError)
+        self.assertEqual(len(clinic), 1010)
+
+    def test_deferred_indexing_builds_on_first_query(self):
+        clinic = PetClinic()
+        clinic.add_many(generate_animals(500), defer_indexing=True)
+        owner = clinic.find_animal_by_id(7).owner
+        expected = [animal for animal in clinic.animals if animal.owner == owner]
+        self.assertEqual(clinic.find_animals_by_owner(owner), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from columnar import ColumnarPetClinic
+from datagen import generate_clinic
+from main import AnimalNotFoundError, Cat
+
+
+class ColumnarPetClinicTest(unittest.TestCase):
+    def setUp(self):
+        self.clinic = generate_clinic(400)
+        self.store = ColumnarPetClinic.from_clinic(self.clinic)
+
+    def ids(self, rows) -> list:
+        return sorted(self.store._ids[row] for row in rows)
+
+    def matching(self, predicate) -> list:
+        return sorted(animal.animal_id for animal in self.clinic.animals if predicate(animal))
+
+    def test_filter_matches_object_loop(self):
+        owner = next(iter(self.clinic.animals)).owner
+        self.assertEqual(self.ids(self.store.filter(species='cat', is_indoor=False, min_age=3)),
+                         self.matching(lambda a: isinstance(a, Cat) and not a.is_indoor and a.age >= 3))
+        self.assertEqual(self.ids(self.store.filter(owner=owner.upper())),
+                         self.matching(lambda a: a.owner.casefold() == owner.casefold()))
+        self.assertEqual(self.ids(self.store.filter(health_status="болен", max_age=5)),
+                         self.matching(lambda a: a.health_status == "Болен" and a.age <= 5))
+        self.assertEqual(self.store.filter(species='Fish'), [])
+
+    def test_aggregate_matches_object_loop(self):
+        groups = {}
+        for animal in self.clinic.animals:
+            if animal.age >= 2:
+                groups.setdefault(animal.__class__.__name__, []).append(animal.age)
+        self.assertEqual(self.store.aggregate('species', 'age', 'count', min_age=2),
+                         {species: len(ages) for species, ages in groups.items()})
+        self.assertEqual(self.store.aggregate('species', 'age', 'max', min_age=2),
+                         {species: max(ages) for species, ages in groups.items()})
+        for species, mean in self.store.aggregate('species', 'age', 'mean', min_age=2).items():
+            self.assertAlmostEqual(mean, sum(groups[species]) / len(groups[species]))
+
+        wingspans = {}
+        for animal in self.clinic.animals:
+            if animal.__class__.__name__ == 'Bird':
+                wingspans.setdefault(animal.health_status, []).append(animal.wingspan)
+        for status, total in self.store.aggregate('health_status', 'wingspan', 'sum', species='bird').items():
+            self.assertAlmostEqual(total, sum(wingspans[status]))
+
+    def test_remove_and_compact(self):
+        for animal_id in range(1, 301):
+            self.clinic.remove_animal(animal_id)
+            self.store.remove_animal(animal_id)
+            if animal_id == 200:
+                self.assertEqual(len(self.store._ids), 400)
+            elif animal_id == 201:
+                self.assertEqual(len(self.store._ids), 199)
+
+        self.store.compact()
+        self.assertEqual(len(self.store._ids), 100)
+        self.assertEqual(len(self.store), 100)
+        self.assertEqual(sorted(view.animal_id for view in self.store.animals), list(range(301, 401)))
+        for animal in self.clinic.animals:
+            self.assertEqual(self.store.find_animal_by_id(animal.animal_id).to_dict(), animal.to_dict())
+        with self.assertRaises(AnimalNotFoundError):
+            self.store.remove_animal(1)
+
+    def test_views_round_trip(self):
+        for animal in self.clinic.animals:
+            view = self.store.find_animal_by_id(animal.animal_id)
+            self.assertEqual(view.to_dict(), animal.to_dict())
+            self.assertEqual(view.materialize().to_dict(), animal.to_dict())
+            self.assertEqual(view.make_sound(), animal.make_sound())
+        self.assertEqual([a.to_dict() for a in self.store.to_clinic().animals],
+                         [a.to_dict() for a in self.clinic.animals])
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('json', 'xml'):
+                path = os.path.join(directory, f'a.{name}')
+                getattr(self.store, f'save_to_{name}')(path)
+                loaded = getattr(ColumnarPetClinic, f'load_from_{name}')(path)
+                self.assertEqual([view.to_dict() for view in loaded.animals],
+                                 [animal.to_dict() for animal in self.clinic.animals])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from concurrent_clinic import ConcurrentPetClinic
+from datagen import generate_animals
+
+
+class _WriteAfterSnapshot(ConcurrentPetClinic):
+    """После первого снимка другой поток успевает добавить животное."""
+
+    def __init__(self):
+        super().__init__()
+        self.extra = iter(generate_animals(100, seed=7, start_id=10_000))
+        self.raced = False
+
+    @property
+    def animals(self):
+        snapshot = super().animals
+        if not self.raced:
+            self.raced = True
+            self.add_animal(next(self.extra))
+        return snapshot
+
+
+class _WriteDuringCopy(dict):
+    """Реестр, во время копирования которого другой поток пытается записать."""
+
+    def __init__(self, clinic: ConcurrentPetClinic):
+        super().__init__(clinic._animals)
+        self.clinic = clinic
+        self.writer_finished = None
+
+    def values(self):
+        if self.writer_finished is None:
+            writer = threading.Thread(target=self.clinic.add_animal, args=(next(generate_animals(1, start_id=999)),))
+            writer.start()
+            writer.join(timeout=5)
+            self.writer_finished = not writer.is_alive()
+        return super().values()
+
+
+class ConcurrentPetClinicTest(unittest.TestCase):
+    def test_snapshot_copy_does_not_block_writers(self):
+        clinic = ConcurrentPetClinic()
+        clinic.add_many(generate_animals(10))
+        clinic._animals = registry = _WriteDuringCopy(clinic)
+
+        snapshot = clinic.animals
+        self.assertTrue(registry.writer_finished)
+        self.assertEqual(len(snapshot), 11)
+        self.assertIs(clinic.animals, snapshot)
+
+    def test_save_uses_one_snapshot(self):
+        clinic = _WriteAfterSnapshot()
+        clinic.add_many(generate_animals(50))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'a.json')
+            clinic.save_to_json(path)
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertEqual(data['metadata']['total_animals'], len(data['animals']))
+        self.assertEqual(len(data['animals']), 50)
+        self.assertEqual(len(clinic), 51)
+
+    def test_snapshot_is_reused_until_next_write(self):
+        clinic = ConcurrentPetClinic()
+        clinic.add_many(generate_animals(10))
+        first = clinic.animals
+        self.assertIs(clinic.animals, first)
+        clinic.remove_animal(3)
+        self.assertIsNot(clinic.animals, first)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(clinic.animals), 9)
+
+    def test_parallel_writers_allocate_distinct_ids(self):
+        clinic = ConcurrentPetClinic()
+        ids = []
+
+        def allocate():
+            for _ in range(500):
+                ids.append(clinic.allocate_id())
+
+        threads = [threading.Thread(target=allocate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(ids)), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
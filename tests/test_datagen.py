@@ -0,0 +1,28 @@
+import itertools
+import unittest
+
+from datagen import generate_animals, generate_records, generate_visits
+from main import Animal
+
+
+class DatagenTest(unittest.TestCase):
+    def test_same_seed_gives_same_data(self):
+        self.assertEqual(list(generate_records(300, seed=7)), list(generate_records(300, seed=7)))
+        self.assertNotEqual(list(generate_records(300, seed=7)), list(generate_records(300, seed=8)))
+        self.assertEqual(list(generate_visits(300, 50, seed=7)), list(generate_visits(300, 50, seed=7)))
+
+    def test_records_are_valid_animals(self):
+        records = list(generate_records(300, start_id=10))
+        self.assertEqual([record['animal_id'] for record in records], list(range(10, 310)))
+        for record in records:
+            self.assertEqual(Animal.from_dict(record).to_dict(), record)
+        self.assertEqual([animal.to_dict() for animal in generate_animals(300, start_id=10)], records)
+
+    def test_visits_are_chronological(self):
+        visits = list(generate_visits(500, 20))
+        self.assertTrue(all(1 <= animal_id <= 20 for animal_id, _ in visits))
+        self.assertTrue(all(a.timestamp <= b.timestamp for (_, a), (_, b) in itertools.pairwise(visits)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from datagen import generate_visits
+from history import MedicalHistory, Visit
+
+
+START = datetime(2024, 1, 1)
+
+
+class MedicalHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.history = MedicalHistory()
+        self.visits = list(generate_visits(2000, 60, seed=3))
+        for animal_id, visit in self.visits:
+            self.history.record(animal_id, visit)
+
+    def expected_animals(self, status=None, diagnosis=None, since=None, until=None):
+        return sorted({animal_id for animal_id, visit in self.visits
+                       if (status is None or (visit.status or '').casefold() == status.casefold())
+                       and (diagnosis is None or visit.diagnosis.casefold() == diagnosis.casefold())
+                       and (since is None or visit.timestamp >= since)
+                       and (until is None or visit.timestamp <= until)})
+
+    def expected_counts(self):
+        animals = {}
+        for animal_id, visit in self.visits:
+            if visit.status is not None:
+                animals.setdefault(visit.status, set()).add(animal_id)
+        return {status: len(ids) for status, ids in animals.items()}
+
+    def assertQueriesMatch(self):
+        statuses = {visit.status for _, visit in self.visits if visit.status} | {"Болен"}
+        diagnoses = {visit.diagnosis for _, visit in self.visits}
+        since, until = self.visits[len(self.visits) // 3][1].timestamp, self.visits[-100][1].timestamp
+        for status in statuses:
+            self.assertEqual(self.history.animals_with(status=status), self.expected_animals(status))
+            self.assertEqual(self.history.animals_with(status=status, since=since, until=until),
+                             self.expected_animals(status, since=since, until=until))
+        for diagnosis in diagnoses:
+            self.assertEqual(self.history.animals_with(diagnosis=diagnosis), self.expected_animals(None, diagnosis))
+        self.assertEqual(self.history.status_counts(), self.expected_counts())
+        self.assertEqual(len(self.history), len(self.visits))
+
+    def test_per_animal_queries(self):
+        history = MedicalHistory()
+        for days in (5, 1, 3, 2, 4):
+            history.record(7, Visit(START + timedelta(days=days), f"Осмотр {days}", "Нет", "Иванов", "Здоров"))
+        self.assertEqual([visit.diagnosis for visit in history.last(7, 2)], ["Осмотр 5", "Осмотр 4"])
+        self.assertEqual([visit.diagnosis for visit in history.between(7, START + timedelta(days=2),
+                                                                       START + timedelta(days=4))],
+                         ["Осмотр 2", "Осмотр 3", "Осмотр 4"])
+        self.assertEqual(history.last(8), [])
+
+    def test_aggregate_queries(self):
+        self.assertQueriesMatch()
+
+    def test_forget_and_reuse_ids(self):
+        rng = random.Random(5)
+        for step in range(40):
+            animal_id = rng.randint(1, 60)
+            forgotten = self.history.forget(animal_id)
+            self.assertEqual(forgotten, sum(1 for i, _ in self.visits if i == animal_id))
+            self.visits = [(i, visit) for i, visit in self.visits if i != animal_id]
+            self.assertEqual(self.history.last(animal_id), [])
+            if step % 3 == 0:
+                visit = Visit(START + timedelta(days=step), "Травма", "Повязка", "Петров", "На лечении")
+                self.history.record(animal_id, visit)
+                self.visits.append((animal_id, visit))
+            self.assertQueriesMatch()
+
+    def test_jsonl_and_xml_round_trip(self):
+        self.history.forget(1)
+        self.visits = [(i, visit) for i, visit in self.visits if i != 1]
+        expected = sorted(self.visits, key=lambda entry: (entry[0], entry[1].timestamp))
+        with tempfile.TemporaryDirectory() as directory:
+            for name, save, load in (('a.jsonl', 'save_to_jsonl', 'load_from_jsonl'),
+                                     ('a.xml', 'save_to_xml', 'load_from_xml')):
+                filename = os.path.join(directory, name)
+                getattr(self.history, save)(filename)
+                loaded = MedicalHistory()
+                getattr(loaded, load)(filename)
+                self.assertEqual(list(loaded), expected)
+                self.assertEqual(loaded.status_counts(), self.expected_counts())
+
+
+if __name__ == '__main__':
+    unittest.main()
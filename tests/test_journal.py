@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from journal import LOG_NAME, SNAPSHOT_NAME, JournaledPetClinic
+from main import Cat, Dog
+
+
+class JournaledPetClinicTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def reopen(self, **options) -> JournaledPetClinic:
+        clinic = JournaledPetClinic(self.directory.name, **options)
+        self.addCleanup(clinic.close)
+        return clinic
+
+    def snapshot_of(self, clinic) -> list:
+        return [animal.to_dict() for animal in clinic.animals]
+
+    def test_log_replay_after_reopen(self):
+        with JournaledPetClinic(self.directory.name) as clinic:
+            clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов"))
+            clinic.add_animal(Cat(2, "Мурка", 2, "Сиамская", "Мария Петрова"))
+            clinic.find_animal_by_id(1).age = 4
+            clinic.reindex_animal(1)
+            clinic.remove_animal(2)
+            expected = self.snapshot_of(clinic)
+
+        reopened = self.reopen()
+        self.assertEqual(self.snapshot_of(reopened), expected)
+        self.assertEqual(reopened.find_animal_by_id(1).age, 4)
+
+    def test_reopen_after_compaction(self):
+        with JournaledPetClinic(self.directory.name, compact_after=3) as clinic:
+            for animal_id in range(1, 6):
+                clinic.add_animal(Dog(animal_id, f"Пёс {animal_id}", 2, "Дворняга", "Иван Иванов"))
+            clinic.remove_animal(5)
+            expected = self.snapshot_of(clinic)
+
+        self.assertEqual(self.snapshot_of(self.reopen()), expected)
+
+    def log_lines(self) -> int:
+        with open(os.path.join(self.directory.name, LOG_NAME), 'rb') as f:
+            return len(f.readlines())
+
+    def test_add_many_appends_accepted_records_to_log(self):
+        with JournaledPetClinic(self.directory.name) as clinic:
+            clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов"))
+            report = clinic.add_many([Cat(2, "Мурка", 2, "Сиамская", "Мария Петрова"),
+                                      {'type': 'Dog', 'animal_id': 1, 'name': "Дубль", 'age': 1,
+                                       'breed': "Такса", 'owner': "Пётр Сидоров"},
+                                      {'type': 'Dog', 'animal_id': 3, 'name': "Шарик", 'age': 1,
+                                       'breed': "Такса", 'owner': "Пётр Сидоров"}], atomic=False)
+            self.assertEqual(report.added, 2)
+            self.assertEqual(self.log_lines(), 3)
+            self.assertFalse(os.path.exists(os.path.join(self.directory.name, SNAPSHOT_NAME)))
+            expected = self.snapshot_of(clinic)
+
+        self.assertEqual(self.snapshot_of(self.reopen()), expected)
+
+    def test_large_add_many_is_compacted(self):
+        with JournaledPetClinic(self.directory.name, compact_after=10) as clinic:
+            clinic.add_many(Dog(animal_id, f"Пёс {animal_id}", 2, "Дворняга", "Иван Иванов")
+                            for animal_id in range(1, 21))
+            self.assertEqual(self.log_lines(), 0)
+            self.assertTrue(os.path.exists(os.path.join(self.directory.name, SNAPSHOT_NAME)))
+        self.assertEqual(len(self.reopen()), 20)
+
+    def test_torn_log_tail_is_dropped(self):
+        with JournaledPetClinic(self.directory.name) as clinic:
+            clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов"))
+            clinic.add_animal(Cat(2, "Мурка", 2, "Сиамская", "Мария Петрова"))
+
+        log_path = os.path.join(self.directory.name, LOG_NAME)
+        with open(log_path, 'ab') as f:
+            f.write(b'{"op": "put", "animal": {"animal_id": 3')
+        intact_size = os.path.getsize(log_path) - len(b'{"op": "put", "animal": {"animal_id": 3')
+
+        clinic = self.reopen()
+        self.assertEqual(sorted(animal.animal_id for animal in clinic.animals), [1, 2])
+        self.assertEqual(os.path.getsize(log_path), intact_size)
+
+        clinic.add_animal(Dog(3, "Шарик", 1, "Такса", "Пётр Сидоров"))
+        clinic.close()
+        self.assertEqual(sorted(animal.animal_id for animal in self.reopen().animals), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
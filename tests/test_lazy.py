@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from datagen import generate_clinic
+from lazy import LazyPetClinic
+from main import FileOperationError
+
+
+class LazyPetClinicTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.clinic = generate_clinic(50)
+        self.expected = {animal.animal_id: animal.to_dict() for animal in self.clinic.animals}
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def write_json(self, name: str, records, **dump_options) -> str:
+        with open(self.path(name), 'w', encoding='utf-8') as f:
+            json.dump({'metadata': {'total_animals': len(records)}, 'animals': records}, f,
+                      ensure_ascii=False, **dump_options)
+        return self.path(name)
+
+    def assertLoadsAll(self, filename: str):
+        with LazyPetClinic(filename) as lazy:
+            self.assertEqual(sorted(lazy.ids()), sorted(self.expected))
+            for animal_id, data in self.expected.items():
+                self.assertEqual(lazy.find_animal_by_id(animal_id).to_dict(), data)
+            self.assertEqual(len(lazy.to_clinic()), len(self.expected))
+
+    def test_own_json_and_xml(self):
+        self.clinic.save_to_json(self.path('a.json'))
+        self.clinic.save_to_xml(self.path('a.xml'))
+        self.assertLoadsAll(self.path('a.json'))
+        self.assertLoadsAll(self.path('a.xml'))
+
+    def test_json_with_any_key_order(self):
+        reordered = [dict(reversed(list(data.items()))) for data in self.expected.values()]
+        self.assertLoadsAll(self.write_json('reversed.json', reordered, indent=4))
+        self.assertLoadsAll(self.write_json('compact.json', reordered, separators=(',', ':')))
+
+        mixed = [data if i % 2 else dict(reversed(list(data.items())))
+                 for i, data in enumerate(self.expected.values())]
+        self.assertLoadsAll(self.write_json('mixed.json', mixed, indent=2))
+
+    def test_json_strings_with_braces(self):
+        records = list(self.expected.values())
+        records[0] = dict(records[0], name='{"animal_id": 999} [x]')
+        self.expected[records[0]['animal_id']] = records[0]
+        self.assertLoadsAll(self.write_json('braces.json', records, indent=2))
+
+    def test_xml_with_any_child_order(self):
+        body = ''.join(
+            f'<animal note="x" type="{data["type"]}">'
+            + ''.join(f'<{key}>{value}</{key}>' for key, value in reversed(list(data.items())) if key != 'type')
+            + '</animal>'
+            for data in self.expected.values())
+        with open(self.path('a.xml'), 'w', encoding='utf-8') as f:
+            f.write(f"<?xml version='1.0' encoding='utf-8'?><pet_clinic><animals>{body}</animals></pet_clinic>")
+        self.assertLoadsAll(self.path('a.xml'))
+
+    def test_record_without_id_is_an_error(self):
+        records = list(self.expected.values())
+        records[3] = {key: value for key, value in records[3].items() if key != 'animal_id'}
+        with self.assertRaises(FileOperationError):
+            LazyPetClinic(self.write_json('missing.json', records, indent=2))
+
+    def test_duplicate_ids_are_an_error(self):
+        records = list(self.expected.values())
+        records.append(dict(records[0]))
+        with self.assertRaises(FileOperationError):
+            LazyPetClinic(self.write_json('duplicate.json', records, indent=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import re
+import tempfile
+import unittest
+
+from main import INSTRUMENTED_METHODS, AnimalError, Dog, PetClinic
+from metrics import NO_METRICS, MetricsRegistry
+
+
+SAMPLE = re.compile(r'^[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? \S+$')
+
+
+def dog(animal_id: int) -> Dog:
+    return Dog(animal_id, "Бобик", 3, "Лабрадор", "Иван Иванов")
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.registry = MetricsRegistry()
+        self.clinic = PetClinic(self.registry)
+
+    def test_methods_are_not_wrapped_when_disabled(self):
+        for clinic in (PetClinic(), PetClinic(NO_METRICS)):
+            for name in INSTRUMENTED_METHODS:
+                self.assertNotIn(name, clinic.__dict__)
+                self.assertEqual(getattr(clinic, name).__func__, getattr(PetClinic, name))
+
+        self.clinic.metrics = NO_METRICS
+        self.assertFalse(set(INSTRUMENTED_METHODS) & set(self.clinic.__dict__))
+
+    def test_reassigning_metrics_does_not_wrap_twice(self):
+        other = MetricsRegistry()
+        self.clinic.metrics = other
+        self.clinic.metrics = self.registry
+        self.clinic.add_animal(dog(1))
+        self.assertEqual(self.registry.latencies['add_animal'].count, 1)
+        self.assertNotIn('add_animal', other.latencies)
+        self.assertEqual(self.clinic.add_animal.__wrapped__.__func__, PetClinic.add_animal)
+
+    def test_failures_report_root_cause(self):
+        self.clinic.add_animal(dog(1))
+        with self.assertRaises(AnimalError):
+            self.clinic.add_animal(dog(1))
+        self.clinic.add_many([dog(1), dog(2)], atomic=False)
+        self.assertEqual(self.registry.failures, {('add_animal', 'InvalidAnimalDataError'): 1,
+                                                  ('add_many', 'InvalidAnimalDataError'): 1})
+
+    def test_bytes_are_counted_for_saves_and_loads(self):
+        self.clinic.add_many([dog(1), dog(2)])
+        for name in ('json', 'xml'):
+            path = os.path.join(self.directory.name, f'a.{name}')
+            getattr(self.clinic, f'save_to_{name}')(path)
+            getattr(self.clinic, f'load_from_{name}')(filename=path)
+            getattr(self.clinic, f'load_from_{name}_stream')(path)
+            size = os.path.getsize(path)
+            self.assertEqual(self.registry.bytes[(f'save_to_{name}', 'written')], size)
+            self.assertEqual(self.registry.bytes[(f'load_from_{name}', 'read')], size)
+            self.assertEqual(self.registry.bytes[(f'load_from_{name}_stream', 'read')], size)
+
+    def test_exports_are_well_formed(self):
+        self.clinic.add_animal(dog(1))
+        self.clinic.find_animal_by_id(1)
+        with self.assertRaises(AnimalError):
+            self.clinic.remove_animal(5)
+        self.clinic.save_to_json(os.path.join(self.directory.name, 'a.json'))
+
+        exported = json.loads(self.registry.to_json())
+        self.assertEqual(exported['operations']['add_animal']['count'], 1)
+        self.assertEqual(exported['failures'], {'remove_animal': {'AnimalNotFoundError': 1}})
+        self.assertGreater(exported['bytes']['save_to_json']['written'], 0)
+
+        text = self.registry.to_prometheus()
+        self.assertTrue(text.endswith('\n'))
+        for line in text.splitlines():
+            if not line.startswith('# '):
+                self.assertRegex(line, SAMPLE)
+        self.assertIn('petclinic_operation_seconds_bucket{operation="find_animal_by_id",le="+Inf"} 1', text)
+        self.assertIn('petclinic_failures_total{operation="remove_animal",error="AnimalNotFoundError"} 1', text)
+        for operation, histogram in self.registry.latencies.items():
+            counts = [int(count) for count in re.findall(
+                rf'_bucket\{{operation="{operation}",le="[^"]+"\}} (\d+)', text)]
+            self.assertEqual(counts, sorted(counts))
+            self.assertEqual(counts[-1], histogram.count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from datagen import generate_animals
+from main import Dog, FileOperationError, InvalidAnimalDataError, PetClinic
+from parallel_loader import load_shards
+
+
+class LoadShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def branch(self, name: str, animals) -> str:
+        clinic = PetClinic()
+        clinic.add_many(animals)
+        path = os.path.join(self.directory.name, name)
+        if name.endswith('.xml'):
+            clinic.save_to_xml(path)
+        else:
+            clinic.save_to_json(path)
+        return path
+
+    def test_mixed_json_and_xml(self):
+        paths = [self.branch('a.json', generate_animals(30)),
+                 self.branch('b.xml', generate_animals(30, seed=2, start_id=31))]
+        sniffed = os.path.join(self.directory.name, 'c')
+        shutil.copy(self.branch('c.xml', generate_animals(30, seed=3, start_id=61)), sniffed)
+        paths.append(sniffed)
+
+        expected = [animal.to_dict() for seed, start in ((42, 1), (2, 31), (3, 61))
+                    for animal in generate_animals(30, seed=seed, start_id=start)]
+        for workers in (1, 2):
+            clinic, conflicts = load_shards(paths, workers=workers)
+            self.assertEqual(conflicts, {})
+            self.assertEqual([animal.to_dict() for animal in clinic.animals], expected)
+            self.assertEqual(len(clinic.find_animals(species='dog')),
+                             sum(record['type'] == 'Dog' for record in expected))
+
+    def test_conflict_policies(self):
+        first = self.branch('first.json', [Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов"),
+                                           Dog(2, "Шарик", 2, "Такса", "Иван Иванов")])
+        second = self.branch('second.xml', [Dog(2, "Рекс", 5, "Овчарка", "Мария Петрова"),
+                                            Dog(3, "Тузик", 1, "Дворняга", "Мария Петрова")])
+
+        with self.assertRaisesRegex(InvalidAnimalDataError, '2'):
+            load_shards([first, second], workers=1)
+
+        clinic, conflicts = load_shards([first, second], workers=1, on_conflict='first')
+        self.assertEqual(conflicts, {2: [first, second]})
+        self.assertEqual(clinic.find_animal_by_id(2).name, "Шарик")
+        self.assertEqual(len(clinic), 3)
+
+        clinic, conflicts = load_shards([first, second], workers=2, on_conflict='last')
+        self.assertEqual(conflicts, {2: [first, second]})
+        self.assertEqual(clinic.find_animal_by_id(2).name, "Рекс")
+        self.assertEqual([animal.animal_id for animal in clinic.find_animals_by_owner("мария петрова")], [2, 3])
+
+        with self.assertRaises(InvalidAnimalDataError):
+            load_shards([first], on_conflict='merge')
+
+    def test_worker_errors_become_file_errors(self):
+        good = self.branch('good.json', generate_animals(10))
+        broken = os.path.join(self.directory.name, 'broken.json')
+        with open(broken, 'w', encoding='utf-8') as f:
+            f.write('{"animals": [{"type": "Dog", "animal_id": 1')
+        missing = os.path.join(self.directory.name, 'missing.xml')
+
+        for workers in (1, 2):
+            for paths in ([good, broken], [good, missing]):
+                with self.assertRaises(FileOperationError) as raised:
+                    load_shards(paths, workers=workers)
+                self.assertIn(os.path.basename(paths[1]), str(raised.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
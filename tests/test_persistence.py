@@ -0,0 +1,86 @@
+import os
+import re
+import tempfile
+import unittest
+
+from main import Bird, Cat, Dog, PetClinic
+
+
+SAVED_AT = re.compile(r'\d{4}-\d\d-\d\dT[\d:.]+')
+
+
+def sample_clinic() -> PetClinic:
+    clinic = PetClinic()
+    clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов", "Здоров", "Большой"))
+    clinic.add_animal(Cat(2, "Мурка", 2, "Сиамская", "Мария <Петрова> & Co", "Здорова", False))
+    clinic.add_animal(Bird(3, "Кеша", 1, "Попугай", "Алексей Сидоров", None, 15.5))
+    return clinic
+
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def assertSameAnimals(self, first: PetClinic, second: PetClinic):
+        self.assertEqual([animal.to_dict() for animal in first.animals],
+                         [animal.to_dict() for animal in second.animals])
+
+    def test_json_round_trip(self):
+        clinic = sample_clinic()
+        clinic.save_to_json(self.path('a.json'))
+        for load in ('load_from_json', 'load_from_json_stream'):
+            loaded = PetClinic()
+            getattr(loaded, load)(self.path('a.json'))
+            self.assertSameAnimals(clinic, loaded)
+
+    def test_xml_round_trip(self):
+        clinic = sample_clinic()
+        clinic.save_to_xml(self.path('a.xml'))
+        for load in ('load_from_xml', 'load_from_xml_stream'):
+            loaded = PetClinic()
+            getattr(loaded, load)(self.path('a.xml'))
+            self.assertSameAnimals(clinic, loaded)
+
+    def test_xml_none_field_survives_save_load_save(self):
+        clinic = sample_clinic()
+        clinic.save_to_xml(self.path('a.xml'))
+        with open(self.path('a.xml'), encoding='utf-8') as f:
+            self.assertIn('<health_status />', f.read())
+
+        loaded = PetClinic()
+        loaded.load_from_xml(self.path('a.xml'))
+        self.assertIsNone(loaded.find_animal_by_id(3).health_status)
+        loaded.save_to_xml(self.path('b.xml'))
+        reloaded = PetClinic()
+        reloaded.load_from_xml_stream(self.path('b.xml'))
+        self.assertIsNone(reloaded.find_animal_by_id(3).health_status)
+
+    def test_fragment_cache_is_opt_in(self):
+        clinic = sample_clinic()
+        clinic.save_to_json(self.path('plain.json'))
+        clinic.save_to_xml(self.path('plain.xml'))
+        self.assertTrue(all(getattr(animal, '_fragments', None) is None for animal in clinic.animals))
+
+        clinic.cache_fragments = True
+        for _ in range(2):
+            clinic.save_to_json(self.path('cached.json'))
+            clinic.save_to_xml(self.path('cached.xml'))
+        self.assertTrue(all(animal._fragments for animal in clinic.animals))
+        for name in ('json', 'xml'):
+            with open(self.path(f'plain.{name}'), encoding='utf-8') as plain, \
+                    open(self.path(f'cached.{name}'), encoding='utf-8') as cached:
+                self.assertEqual(SAVED_AT.sub('', plain.read()), SAVED_AT.sub('', cached.read()))
+
+        clinic.find_animal_by_id(1).age = 5
+        clinic.save_to_json(self.path('cached.json'))
+        loaded = PetClinic()
+        loaded.load_from_json(self.path('cached.json'))
+        self.assertEqual(loaded.find_animal_by_id(1).age, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from datagen import generate_animals, generate_records
+from main import AnimalError, Cat, Dog, PetClinic
+
+
+def ids(animals) -> list:
+    return sorted(animal.animal_id for animal in animals)
+
+
+class FindAnimalsTest(unittest.TestCase):
+    def setUp(self):
+        self.clinic = PetClinic()
+        self.clinic.add_many([
+            Cat(1, "Мурка", 2, "Сиамская", "Иван Иванов", "Больна", False),
+            Cat(2, "Барсик", 4, "Британская", "иван иванов", "Здоров", False),
+            Cat(3, "Пушок", 1, "Сиамская", "Иван Иванов", "На лечении", True),
+            Cat(4, "Снежок", 5, "Персидская", "Мария Петрова", "Болен", False),
+            Dog(5, "Бобик", 3, "Лабрадор", "Иван Иванов", "Болен"),
+        ])
+
+    def test_outdoor_cats_of_owner_that_are_not_healthy(self):
+        found = self.clinic.find_animals(species='Cat', owner="ИВАН ИВАНОВ", is_indoor=False,
+                                         exclude={'health_status': "здоров"})
+        self.assertEqual(ids(found), [1])
+
+    def test_single_fields_and_case_folding(self):
+        self.assertEqual(ids(self.clinic.find_animals(owner="иван иванов")), [1, 2, 3, 5])
+        self.assertEqual(ids(self.clinic.find_animals(breed="СИАМСКАЯ")), [1, 3])
+        self.assertEqual(ids(self.clinic.find_animals(species='dog')), [5])
+        self.assertEqual(ids(self.clinic.find_animals(is_indoor=False)), [1, 2, 4])
+        self.assertEqual(ids(self.clinic.find_animals(is_indoor=True)), [3])
+        self.assertEqual(ids(self.clinic.find_animals(owner=None)), [1, 2, 3, 4, 5])
+        self.assertEqual(self.clinic.find_animals(owner="Никто"), [])
+
+    def test_intersection_and_exclusion(self):
+        self.assertEqual(ids(self.clinic.find_animals(owner="Иван Иванов", breed="Сиамская")), [1, 3])
+        self.assertEqual(ids(self.clinic.find_animals(exclude={'species': 'cat'})), [5])
+        self.assertEqual(ids(self.clinic.find_animals(owner="Иван Иванов",
+                                                      exclude={'health_status': "Болен", 'is_indoor': True})), [1, 2])
+        with self.assertRaises(AnimalError):
+            self.clinic.find_animals(name="Мурка")
+
+    def test_index_follows_reindex(self):
+        animal = self.clinic.find_animal_by_id(2)
+        animal.health_status = "Болен"
+        self.clinic.reindex_animal(2)
+        self.assertEqual(ids(self.clinic.find_animals(health_status="болен")), [2, 4, 5])
+        self.assertEqual(ids(self.clinic.find_animals(health_status="Здоров")), [])
+        self.clinic.remove_animal(5)
+        self.assertEqual(ids(self.clinic.find_animals(health_status="болен")), [2, 4])
+
+
+class DeferredIndexTest(unittest.TestCase):
+    def expected(self, clinic: PetClinic) -> list:
+        return ids(animal for animal in clinic.animals
+                   if animal.__class__.__name__ == 'Cat' and not animal.is_indoor
+                   and animal.health_status != "Здорова")
+
+    def query(self, clinic: PetClinic) -> list:
+        return ids(clinic.find_animals(species='cat', is_indoor=False, exclude={'health_status': "здорова"}))
+
+    def test_indexes_are_built_after_replace_all(self):
+        clinic = PetClinic()
+        clinic._replace_all({animal.animal_id: animal for animal in generate_animals(500)})
+        self.assertFalse(clinic._indexes_ready)
+        self.assertEqual(self.query(clinic), self.expected(clinic))
+        self.assertTrue(clinic._indexes_ready)
+
+    def test_indexes_are_built_after_deferred_add_many(self):
+        clinic = PetClinic()
+        clinic.add_many(generate_records(300))
+        clinic.add_many(generate_records(200, seed=9, start_id=301), defer_indexing=True)
+        self.assertFalse(clinic._indexes_ready)
+        self.assertEqual(self.query(clinic), self.expected(clinic))
+        clinic.add_animal(Cat(1000, "Мурка", 2, "Сиамская", "Иван Иванов", "Больна", False))
+        self.assertIn(1000, self.query(clinic))
+        self.assertEqual(self.query(clinic), self.expected(clinic))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import os
+import tempfile
+import unittest
+
+from main import (SPECIES, Animal, Dog, Field, FileOperationError, InvalidAnimalDataError, PetClinic,
+                  iter_animals_from_csv, register_species, write_csv_stream)
+from snapshot import save_snapshot
+
+
+class Hamster(Animal):
+    __slots__ = ('wheel', 'color')
+
+    def make_sound(self) -> str:
+        return "Пи-пи!"
+
+
+class SpeciesSchemaTest(unittest.TestCase):
+    def assertSameError(self, data: dict):
+        with self.assertRaises(InvalidAnimalDataError) as expected:
+            Dog(**{key: value for key, value in data.items() if key != 'type'})
+        text = {key: str(value) for key, value in data.items()}
+        for decode, source in ((Animal.from_dict, data), (Dog._schema.decode_text, text)):
+            with self.assertRaises(InvalidAnimalDataError) as actual:
+                decode(source)
+            self.assertEqual(str(actual.exception), str(expected.exception))
+
+    def test_errors_are_reported_in_constructor_order(self):
+        data = {'type': 'Dog', 'animal_id': 1, 'name': "", 'age': 0, 'breed': "", 'owner': "",
+                'dog_size': "Огромный"}
+        self.assertSameError(data)
+        self.assertSameError(dict(data, age=2))
+        self.assertSameError(dict(data, age=2, name="Бобик"))
+        self.assertSameError(dict(data, age=2, name="Бобик", breed="Такса"))
+        self.assertSameError(dict(data, age=2, name="Бобик", breed="Такса", owner="Иван Иванов"))
+
+    def test_rejects_field_names_that_are_not_identifiers(self):
+        for name in ("wheel size", "class", "wheel); import os; (", ""):
+            with self.assertRaises(InvalidAnimalDataError):
+                register_species(Hamster, [Field(name, 'text', "Поле")], type_name="BadHamster")
+        self.assertNotIn("BadHamster", SPECIES)
+
+    def test_registered_species_round_trips_through_every_format(self):
+        register_species(Hamster, [Field('wheel', 'non_negative', "Колесо", default=10.0),
+                                   Field('color', 'choice', "Окрас", default="Рыжий", choices=("Рыжий", "Белый"))])
+        self.addCleanup(SPECIES.pop, 'Hamster')
+
+        clinic = PetClinic()
+        clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов"))
+        clinic.add_animal(Animal.from_dict({'type': 'Hamster', 'animal_id': 2, 'name': "Хома", 'age': 1,
+                                            'breed': "Сирийский", 'owner': "Мария Петрова", 'color': "Белый"}))
+        expected = [animal.to_dict() for animal in clinic.animals]
+        self.assertEqual(expected[1]['wheel'], 10.0)
+        with self.assertRaises(InvalidAnimalDataError):
+            Animal.from_dict(dict(expected[1], color="Синий"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('a.json', 'a.xml'):
+                filename = os.path.join(directory, name)
+                getattr(clinic, f'save_to_{name[2:]}')(filename)
+                loaded = PetClinic()
+                getattr(loaded, f'load_from_{name[2:]}')(filename)
+                self.assertEqual([animal.to_dict() for animal in loaded.animals], expected)
+
+            filename = os.path.join(directory, 'a.csv')
+            with open(filename, 'w', encoding='utf-8', newline='') as f:
+                write_csv_stream(f, clinic.animals)
+            self.assertEqual([animal.to_dict() for animal in iter_animals_from_csv(filename)], expected)
+
+            with self.assertRaisesRegex(FileOperationError, 'Hamster'):
+                save_snapshot(clinic, os.path.join(directory, 'a.snap'))
+            self.assertFalse(os.path.exists(os.path.join(directory, 'a.snap')))
+
+        buffer = io.StringIO()
+        write_csv_stream(buffer, clinic.animals)
+        self.assertIn('wheel', buffer.getvalue().splitlines()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
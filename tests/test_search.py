@@ -0,0 +1,42 @@
+import unittest
+
+from main import Cat, Dog
+from search import SearchIndex, SearchablePetClinic
+
+
+class SearchIndexTest(unittest.TestCase):
+    def test_vocabulary_tracks_interleaved_adds_and_removes(self):
+        index = SearchIndex()
+        index.add(1, "Иванов Иван")
+        index.add(2, "Ивашкин Пётр")
+        self.assertEqual(index.prefix_tokens("ива"), ["иван", "иванов", "ивашкин"])
+
+        index.remove(2)
+        index.add(3, "Ивашкин Олег")
+        index.add(4, "Иволгин")
+        index.remove(4)
+        index.add(5, "Иволгин")
+        self.assertEqual(index.prefix_tokens("ив"), ["иван", "иванов", "ивашкин", "иволгин"])
+        self.assertEqual(index.prefix_tokens("ив", limit=2), ["иван", "иванов"])
+
+        index.remove(1)
+        index.remove(3)
+        self.assertEqual(index.prefix_tokens("ив"), ["иволгин"])
+        self.assertEqual(index.prefix_tokens("пётр"), [])
+
+    def test_fuzzy_and_prefix_search(self):
+        clinic = SearchablePetClinic()
+        clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иванов Иван"))
+        clinic.add_animal(Cat(2, "Мурка", 2, "Сиамская", "Петрова Мария"))
+        clinic.add_animal(Cat(3, "Мурзик", 4, "Британская", "Иванова Анна"))
+
+        self.assertEqual(clinic.search("Ивнов", fields=['owner'])[0][0].animal_id, 1)
+        self.assertEqual({animal.animal_id for animal, _ in clinic.search("мур", fields=['name'])}, {2, 3})
+        self.assertEqual(clinic.autocomplete("петр"), ["Петрова Мария"])
+
+        clinic.remove_animal(2)
+        self.assertEqual(clinic.autocomplete("петр"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
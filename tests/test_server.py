@@ -0,0 +1,42 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from datagen import generate_clinic
+from server import ClinicServer
+from snapshot import save_snapshot
+
+
+class ClinicServerTest(unittest.TestCase):
+    def request(self, server: ClinicServer, **request) -> dict:
+        return asyncio.run(server.dispatch(json.dumps(request).encode('utf-8')))
+
+    def test_load_builds_indexes_off_the_event_loop(self):
+        source = generate_clinic(200)
+        owner = source.find_animal_by_id(5).owner
+        server = ClinicServer()
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('a.snap', 'a.json', 'a.xml'):
+                path = os.path.join(directory, name)
+                if name.endswith('.snap'):
+                    save_snapshot(source, path)
+                elif name.endswith('.json'):
+                    source.save_to_json(path)
+                else:
+                    source.save_to_xml(path)
+
+                self.assertEqual(self.request(server, op='load', filename=path), {'ok': True, 'result': 200})
+                self.assertTrue(server.clinic._indexes_ready, name)
+                found = self.request(server, op='find_by_owner', owner=owner)['result']
+                self.assertEqual(len(found), len(source.find_animals_by_owner(owner)))
+
+    def test_errors_are_reported_not_raised(self):
+        response = self.request(ClinicServer(), op='remove', animal_id=42)
+        self.assertFalse(response['ok'])
+        self.assertEqual(response['type'], 'AnimalNotFoundError')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+
+from main import AnimalError, Cat, Dog, FileOperationError
+from sharded import MANIFEST_NAME, BlockIdAllocator, ShardedPetClinic, owner_shard
+
+
+OWNERS = [f"Владелец {number}" for number in range(12)]
+
+
+def owner_clinic() -> ShardedPetClinic:
+    clinic = ShardedPetClinic(4, 'owner', block_size=10)
+    for number in range(40):
+        owner = OWNERS[number % len(OWNERS)]
+        clinic.add_animal(Dog(clinic.allocate_id(owner), f"Пёс {number}", 2, "Дворняга", owner))
+    return clinic
+
+
+class BlockIdAllocatorTest(unittest.TestCase):
+    def test_shards_allocate_disjoint_blocks(self):
+        allocators = [BlockIdAllocator(shard, 3, block_size=5) for shard in range(3)]
+        issued = [[allocator.allocate() for _ in range(12)] for allocator in allocators]
+        self.assertEqual(issued[0][:7], [1, 2, 3, 4, 5, 16, 17])
+        self.assertEqual(issued[1][:6], [6, 7, 8, 9, 10, 21])
+        self.assertEqual(len(set().union(*issued)), 36)
+        for allocator, ids in zip(allocators, issued):
+            self.assertTrue(all(allocator.owns(animal_id) for animal_id in ids))
+            self.assertFalse(any(other.owns(animal_id) for other in allocators if other is not allocator
+                                 for animal_id in ids))
+
+    def test_observe_skips_taken_ids(self):
+        allocator = BlockIdAllocator(1, 3, block_size=5)
+        allocator.observe(8)
+        self.assertEqual(allocator.allocate(), 9)
+        allocator.observe(3)
+        self.assertEqual(allocator.allocate(), 10)
+        allocator.observe(12)
+        self.assertEqual(allocator.allocate(), 21)
+
+
+class RoutingTest(unittest.TestCase):
+    def test_range_partition_routes_by_id_block(self):
+        clinic = ShardedPetClinic(3, 'range', block_size=10)
+        for animal_id in (1, 10, 11, 25, 31):
+            clinic.add_animal(Dog(animal_id, "Бобик", 2, "Такса", "Иван Иванов"))
+        self.assertEqual([sorted(animal.animal_id for animal in shard.animals) for shard in clinic.shards],
+                         [[1, 10, 31], [11], [25]])
+        self.assertEqual([animal.animal_id for animal in clinic.find_animals_by_owner("иван иванов")],
+                         [1, 10, 11, 25, 31])
+        with self.assertRaises(AnimalError):
+            clinic.add_animal(Cat(25, "Мурка", 2, "Сиамская", "Мария Петрова"))
+
+    def test_owner_partition_keeps_owner_pets_together(self):
+        clinic = owner_clinic()
+        for owner in OWNERS:
+            home = clinic.shards[owner_shard(owner, 4)]
+            self.assertEqual({animal.owner for animal in home.find_animals_by_owner(owner)}, {owner})
+            self.assertEqual(len(clinic.find_animals_by_owner(owner)), len(home.find_animals_by_owner(owner)))
+        self.assertEqual(len(clinic), 40)
+        self.assertEqual([animal.animal_id for animal in clinic.find_animals(owner=OWNERS[0])],
+                         sorted(animal.animal_id for animal in clinic.animals if animal.owner == OWNERS[0]))
+
+    def test_reindex_moves_animal_to_new_owner_shard(self):
+        clinic = owner_clinic()
+        first, second = OWNERS[0], next(owner for owner in OWNERS if owner_shard(owner, 4) != owner_shard(OWNERS[0], 4))
+        animal = clinic.find_animals_by_owner(first)[0]
+        animal.owner = second
+        clinic.reindex_animal(animal.animal_id)
+
+        self.assertIn(animal, clinic.shards[owner_shard(second, 4)].animals)
+        self.assertNotIn(animal, clinic.shards[owner_shard(first, 4)].animals)
+        self.assertIn(animal, clinic.find_animals_by_owner(second))
+        self.assertIs(clinic.find_animal_by_id(animal.animal_id), animal)
+        self.assertEqual(len(clinic), 40)
+
+
+class SaveLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip_with_only(self):
+        clinic = owner_clinic()
+        clinic.save(self.directory.name, 'xml')
+        expected = sorted(animal.animal_id for animal in clinic.animals)
+
+        loaded = ShardedPetClinic.load(self.directory.name)
+        self.assertEqual(sorted(animal.animal_id for animal in loaded.animals), expected)
+        self.assertEqual([len(shard) for shard in loaded.shards], [len(shard) for shard in clinic.shards])
+
+        partial = ShardedPetClinic.load(self.directory.name, only=[2])
+        self.assertEqual([len(shard) for shard in partial.shards], [0, 0, len(clinic.shards[2]), 0])
+        with self.assertRaises(AnimalError):
+            partial.add_animal(Dog(partial.allocate_id(), "Шарик", 1, "Такса",
+                                   next(owner for owner in OWNERS if owner_shard(owner, 4) == 0)))
+
+        partial.remove_animal(next(iter(partial.shards[2].animals)).animal_id)
+        partial.save(self.directory.name, 'json')
+        reloaded = ShardedPetClinic.load(self.directory.name)
+        self.assertEqual(len(reloaded), 39)
+        self.assertEqual([len(shard) for shard in reloaded.shards[:2]], [len(shard) for shard in clinic.shards[:2]])
+
+    def test_manifest_counters_carry_over(self):
+        clinic = ShardedPetClinic(2, 'range', block_size=10)
+        clinic.add_animal(Dog(clinic.allocate_id(), "Бобик", 2, "Такса", "Иван Иванов"))
+        clinic.add_animal(Dog(clinic.allocate_id(), "Шарик", 2, "Такса", "Иван Иванов"))
+        issued = {clinic.allocate_id() for _ in range(4)}
+        clinic.save(self.directory.name)
+        with open(os.path.join(self.directory.name, MANIFEST_NAME), encoding='utf-8') as f:
+            self.assertIn('next_ids', f.read())
+
+        partial = ShardedPetClinic.load(self.directory.name, only=[0])
+        fresh = {partial.allocate_id() for _ in range(10)}
+        self.assertFalse(fresh & issued)
+        self.assertFalse(fresh & {1, 11})
+
+
+class PartialLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_ids_of_unloaded_shards_are_rejected(self):
+        full = owner_clinic()
+        full.save(self.directory.name)
+        taken = next(iter(full.shards[1].animals)).animal_id
+        owner = next(owner for owner in OWNERS if owner_shard(owner, 4) == 0)
+
+        partial = ShardedPetClinic.load(self.directory.name, only=[0])
+        with self.assertRaises(AnimalError):
+            partial.add_animal(Dog(taken, "Дубль", 1, "Такса", owner))
+        report = partial.add_many([Dog(taken, "Дубль", 1, "Такса", owner)], atomic=False)
+        self.assertEqual((report.added, len(report.issues)), (0, 1))
+
+        partial.add_animal(Dog(partial.allocate_id(owner), "Шарик", 1, "Такса", owner))
+        partial.save(self.directory.name)
+        self.assertEqual(len(ShardedPetClinic.load(self.directory.name)), 41)
+
+    def test_load_rejects_ids_repeated_across_shards(self):
+        full = owner_clinic()
+        taken = next(iter(full.shards[1].animals))
+        full.shards[0].add_animal(Dog(taken.animal_id, "Дубль", 1, "Такса", taken.owner))
+        full.save(self.directory.name)
+        with self.assertRaises(FileOperationError):
+            ShardedPetClinic.load(self.directory.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+from concurrent_clinic import ConcurrentPetClinic
+from datagen import generate_animals, generate_clinic
+from main import Bird, Cat, Dog, FileOperationError, PetClinic
+from snapshot import Snapshot, convert, load_snapshot, save_snapshot
+
+
+class _WriteDuringSave(ConcurrentPetClinic):
+    """Пока снимок собирается, другой поток успевает добавить животное."""
+
+    @property
+    def animals(self):
+        snapshot = super().animals
+        self.add_animal(Dog(self.allocate_id(), "Шарик", 1, "Такса", "Пётр Сидоров"))
+        return snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def assertSameAnimals(self, first: PetClinic, second: PetClinic):
+        self.assertEqual([animal.to_dict() for animal in first.animals],
+                         [animal.to_dict() for animal in second.animals])
+
+    def test_round_trip_keeps_every_field(self):
+        clinic = PetClinic()
+        clinic.add_animal(Dog(1, "Бобик", 3, "Лабрадор", "Иван Иванов", "Здоров", "Большой"))
+        clinic.add_animal(Cat(2, "Мурка", 2, "Сиамская", "Мария <Петрова> & Co", "Здорова", False))
+        clinic.add_animal(Bird(3, "Кеша", 1, "Попугай", "Алексей Сидоров", None, 15.5))
+        save_snapshot(clinic, self.path('a.snap'))
+
+        loaded = load_snapshot(self.path('a.snap'))
+        self.assertSameAnimals(clinic, loaded)
+        self.assertEqual([animal.animal_id for animal in loaded.find_animals_by_owner("Иван Иванов")], [1])
+
+    def test_convert_between_formats(self):
+        clinic = generate_clinic(200)
+        clinic.save_to_json(self.path('a.json'))
+        self.assertEqual(convert(self.path('a.json'), self.path('a.snap')), 200)
+        self.assertEqual(convert(self.path('a.snap'), self.path('a.xml')), 200)
+
+        loaded = PetClinic()
+        loaded.load_from_xml(self.path('a.xml'))
+        self.assertSameAnimals(clinic, loaded)
+
+    def test_count_matches_rows_written_during_concurrent_writes(self):
+        clinic = _WriteDuringSave()
+        clinic.add_many(generate_animals(100))
+        save_snapshot(clinic, self.path('a.snap'))
+        with Snapshot(self.path('a.snap')) as snapshot:
+            self.assertEqual(len(snapshot), 100)
+            self.assertEqual(len(snapshot.ids), 100)
+        self.assertEqual(len(load_snapshot(self.path('a.snap'))), 100)
+
+    def test_truncated_or_corrupt_file_is_an_error(self):
+        save_snapshot(generate_clinic(100), self.path('a.snap'))
+        with open(self.path('a.snap'), 'rb') as f:
+            data = f.read()
+        for name, damaged in (('short.snap', data[:len(data) // 2]), ('strings.snap', data[:-5]),
+                              ('count.snap', data[:8] + (10 ** 6).to_bytes(8, 'little') + data[16:])):
+            with open(self.path(name), 'wb') as f:
+                f.write(damaged)
+            with self.assertRaises(FileOperationError):
+                Snapshot(self.path(name))
+            with self.assertRaises(FileOperationError):
+                load_snapshot(self.path(name))
+
+    def test_rejects_foreign_file(self):
+        with open(self.path('a.snap'), 'wb') as f:
+            f.write(b'not a snapshot' * 16)
+        with self.assertRaises(FileOperationError):
+            load_snapshot(self.path('a.snap'))
+        with self.assertRaises(FileOperationError):
+            convert(self.path('a.snap'), self.path('a.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()